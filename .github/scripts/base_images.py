@@ -0,0 +1,272 @@
+"""Discovery and GHCR tag mapping for base-images/ directories.
+
+Each subdirectory of base-images/ holds a single Dockerfile that mirrors
+an upstream image (e.g. ``base-images/node-18-alpine``).  The helpers here
+discover those directories, extract the upstream FROM line and translate
+it into the GHCR tag the images are published under.
+"""
+
+import atexit
+import functools
+import json
+import mmap
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+_GHCR_PREFIX = 'ghcr.io/groupsky/homy/'
+_DISTRO_PATCH_CHARS = '0123456789.'
+_ALPINE_SUFFIX = '-alpine'
+_ALPINE_SUFFIX_LEN = len(_ALPINE_SUFFIX)
+
+
+# Parse results keyed by path -> [mtime_ns, size, parsed].  With
+# BASE_IMAGES_CACHE_FILE set the cache persists across runs, so the
+# common CI case of unchanged Dockerfiles costs one stat each.
+_parse_cache: Dict[str, list] = {}
+_parse_cache_loaded = False
+_parse_cache_dirty = False
+
+
+def _load_parse_cache():
+    global _parse_cache_loaded
+    _parse_cache_loaded = True
+    cache_file = os.environ.get('BASE_IMAGES_CACHE_FILE')
+    if not cache_file:
+        return
+    try:
+        with open(cache_file) as f:
+            _parse_cache.update(json.load(f))
+    except (OSError, ValueError):
+        pass
+
+
+def _save_parse_cache():
+    cache_file = os.environ.get('BASE_IMAGES_CACHE_FILE')
+    if not cache_file or not _parse_cache_dirty:
+        return
+    try:
+        with open(cache_file, 'w') as f:
+            json.dump(_parse_cache, f)
+    except OSError:
+        pass
+
+
+atexit.register(_save_parse_cache)
+
+
+def _cached_by_mtime(func):
+    """Memoize a per-file parser on the file's (mtime_ns, size)."""
+    @functools.wraps(func)
+    def wrapper(path):
+        global _parse_cache_dirty
+        if not _parse_cache_loaded:
+            _load_parse_cache()
+        key = os.fspath(path)
+        st = os.stat(key)
+        entry = _parse_cache.get(key)
+        if entry is not None and entry[0] == st.st_mtime_ns and entry[1] == st.st_size:
+            return entry[2]
+        result = func(path)
+        _parse_cache[key] = [st.st_mtime_ns, st.st_size, result]
+        _parse_cache_dirty = True
+        return result
+    return wrapper
+
+
+def _first_from_image_mmap(dockerfile_path) -> Optional[str]:
+    """mmap fast path: find the first conventional ``FROM `` line.
+
+    bytes.find runs as memchr over pages the kernel faults in lazily, so
+    a big multi-stage file costs only its leading pages.  Unconventional
+    spellings (lowercase, indented) return None and the caller falls
+    back to the line scan.
+    """
+    with open(dockerfile_path, 'rb') as f, \
+            mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        if mm[:5] == b'FROM ':
+            start = 5
+        else:
+            idx = mm.find(b'\nFROM ')
+            if idx < 0:
+                return None
+            start = idx + 6
+        end = mm.find(b'\n', start)
+        if end < 0:
+            end = len(mm)
+        parts = mm[start:end].split(None, 1)
+        return parts[0].decode('utf-8', 'replace') if parts else None
+
+
+@_cached_by_mtime
+def parse_base_dockerfile(dockerfile_path) -> Optional[Dict]:
+    """Extract the upstream image from a base-image Dockerfile.
+
+    Returns a dict with ``upstream_image``, ``image_name`` and
+    ``raw_version`` keys, or None when no FROM line is present.
+    """
+    # Only the first FROM line matters, so iterate and stop there rather
+    # than slurping a long multi-stage file whole.  Binary mode keeps
+    # the UTF-8 decode to the one token we keep — the instruction itself
+    # is ASCII.  Files past one page take the mmap/memchr fast path.
+    upstream_image = None
+    if os.stat(dockerfile_path).st_size > 4096:
+        upstream_image = _first_from_image_mmap(dockerfile_path)
+    if upstream_image is None:
+        with open(dockerfile_path, 'rb') as f:
+            for raw in f:
+                line = raw.lstrip()
+                if line[:5].lower() not in (b'from ', b'from\t'):
+                    continue
+                parts = line.split(None, 2)
+                if len(parts) > 1:
+                    upstream_image = parts[1].decode('utf-8', 'replace')
+                    break
+    if upstream_image is None:
+        return None
+    # rpartition: one C call and no list allocation, versus the
+    # membership test plus rsplit pair.
+    image_name, sep, raw_version = upstream_image.rpartition(':')
+    if not sep:
+        image_name, raw_version = upstream_image, None
+    return {
+        'upstream_image': upstream_image,
+        'image_name': image_name,
+        'raw_version': raw_version,
+    }
+
+
+def _iter_base_images(base_images_path):
+    """Yield ``(name, directory, dockerfile, parsed)`` per base image.
+
+    One scandir pass feeds both discovery and the mapping builder, so
+    neither walks the tree or parses a Dockerfile twice.  Hidden
+    directories, directories without a Dockerfile and Dockerfiles
+    without a FROM line are skipped; a missing base-images directory
+    yields nothing.
+    """
+    # Callers pass Path or str; everything below runs on plain strings
+    # (os.scandir entry paths), keeping pathlib allocations out of the
+    # per-entry loop.
+    base = os.fspath(base_images_path)
+    # isdir instead of catching FileNotFoundError: the "repo has no
+    # base-images/" case is common and should not pay exception unwind.
+    if not os.path.isdir(base):
+        return
+    candidates = []
+    with os.scandir(base) as entries:
+        for entry in sorted(entries, key=lambda e: e.name):
+            if not entry.is_dir(follow_symlinks=False) or entry.name.startswith('.'):
+                continue
+            # Scan the subdirectory instead of stat-ing a joined path:
+            # the file type comes straight from the readdir d_type.
+            dockerfile = None
+            with os.scandir(entry.path) as sub:
+                for child in sub:
+                    if child.name == 'Dockerfile' and child.is_file(follow_symlinks=False):
+                        dockerfile = child.path
+                        break
+            if dockerfile is None:
+                continue
+            candidates.append((entry.name, entry.path, dockerfile))
+    if len(candidates) < 2:
+        parsed_all = [parse_base_dockerfile(d) for _, _, d in candidates]
+    else:
+        # Parsing is open/read-bound and the GIL drops during file I/O,
+        # so the per-Dockerfile waits overlap across threads.
+        workers = min(32, len(candidates))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            parsed_all = list(executor.map(
+                parse_base_dockerfile, (d for _, _, d in candidates)))
+    for (name, directory, dockerfile), parsed in zip(candidates, parsed_all):
+        if parsed is not None:
+            yield name, directory, dockerfile, parsed
+
+
+@dataclass(frozen=True, slots=True)
+class BaseImage:
+    """One discovered base image.
+
+    Slotted and immutable: a fraction of the memory of the dict records
+    it replaces.  Subscript access is kept so existing dict-style
+    callers (and the accessor lambdas in change detection) still work.
+    """
+    name: str
+    directory: str
+    dockerfile: str
+    upstream_image: str
+    image_name: str
+    raw_version: Optional[str]
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+
+def iter_base_images(base_images_path):
+    """Yield base-image records one at a time.
+
+    Streaming counterpart of :func:`discover_base_images` for callers
+    that can stop early or do not need the whole list in memory.
+    """
+    for name, directory, dockerfile, parsed in _iter_base_images(base_images_path):
+        yield BaseImage(name=name, directory=directory,
+                        dockerfile=dockerfile, **parsed)
+
+
+def discover_base_images(base_images_path) -> List[BaseImage]:
+    """List the base images defined under ``base_images_path``."""
+    return list(iter_base_images(base_images_path))
+
+
+# Pure and called with the same (directory, version) pairs by every
+# mapping build in a run; repeats resolve from the cache.
+@functools.lru_cache(maxsize=512)
+def normalize_ghcr_tag(directory, raw_version) -> str:
+    """Map a base-image directory and upstream version to our GHCR tag.
+
+    Distro patch releases (``18.19.0-alpine3.19``) are collapsed to the
+    minor distro tag (``18.19.0-alpine``) so a rebuild of the same upstream
+    minor does not produce a new tag.
+    """
+    version = raw_version if raw_version else 'latest'
+    # Plain string ops; tags are short and this runs per image per
+    # mapping build, so the regex engine is overkill here.
+    if directory.startswith('node-') and directory.endswith(_ALPINE_SUFFIX):
+        start = version.rfind(_ALPINE_SUFFIX)
+        if start != -1:
+            end = start + _ALPINE_SUFFIX_LEN
+            tail = version[end:]
+            if all(ch in _DISTRO_PATCH_CHARS for ch in tail):
+                version = version[:end]
+    return f'{_GHCR_PREFIX}{directory}:{version}'
+
+
+def build_directory_to_ghcr_mapping(base_images_path,
+                                    base_images=None) -> Dict[str, Dict[str, str]]:
+    """Build both directions of the directory <-> GHCR tag mapping.
+
+    Pass ``base_images`` when discovery has already run to avoid a second
+    filesystem walk and Dockerfile parse per image.
+    """
+    if base_images is None:
+        # Consume the scandir pass directly; no record dicts are built
+        # just to be picked apart again here.
+        items = ((name, directory, parsed['raw_version'])
+                 for name, directory, _, parsed
+                 in _iter_base_images(base_images_path))
+    else:
+        items = ((image['name'], image['directory'], image['raw_version'])
+                 for image in base_images)
+    # Materializing the pairs first lets dict() size both tables from a
+    # known length instead of resizing as entries trickle in.
+    pairs = [(directory, normalize_ghcr_tag(name, raw_version))
+             for name, directory, raw_version in items]
+    dir_to_ghcr = dict(pairs)
+    # Tags are unique per directory, so the reverse map is a C-level
+    # comprehension swap instead of a second insertion per entry.
+    ghcr_to_dir = {tag: directory for directory, tag in pairs}
+    return {'dir_to_ghcr': dir_to_ghcr, 'ghcr_to_dir': ghcr_to_dir}
@@ -0,0 +1,257 @@
+"""Detect which base images and services changed between two git refs.
+
+Used by the docker publishing workflow to rebuild only the images a push
+or pull request actually touched instead of every image on every run.
+"""
+
+import functools
+import os
+import re
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from errors import ValidationError
+
+# Instructions that would make a base image diverge from its upstream.
+# Base image Dockerfiles must stay exact copies (FROM + comments only) so
+# the GHCR mirror is byte-for-byte reproducible from the upstream tag.
+# Compiled once so validation is a single C-level scan per file.
+_FORBIDDEN_RE = re.compile(
+    rb'(?m)^[ \t]*(RUN|COPY|ADD|WORKDIR|CMD|ENTRYPOINT|ENV|ARG|EXPOSE|USER'
+    rb'|VOLUME|HEALTHCHECK|ONBUILD|SHELL|STOPSIGNAL)\b',
+    re.IGNORECASE,
+)
+
+
+def _same_commit(base_ref) -> bool:
+    """True when ``base_ref`` resolves to the same commit as HEAD.
+
+    Direct pushes to master diff a ref against itself; resolving both
+    sides with ``rev-parse --verify`` is orders of magnitude cheaper than
+    asking ``git diff`` to walk the trees just to find nothing.
+    """
+    return (
+        subprocess.check_output(['git', 'rev-parse', '--verify', base_ref]).strip()
+        == subprocess.check_output(['git', 'rev-parse', '--verify', 'HEAD']).strip()
+    )
+
+
+# Bounded: a workflow touches a handful of (ref, scope) pairs, and large
+# diffs should not accumulate without limit in long-lived processes.
+@functools.lru_cache(maxsize=8)
+def _diff_files(base_ref, pathspecs):
+    """Run the scoped diff once per (base_ref, pathspecs) pair.
+
+    lru_cache keys the memoization, so the diff runs at most once per
+    pair per process; tests reset it with ``_diff_files.cache_clear()``.
+    """
+    if _same_commit(base_ref):
+        return ()
+    scope = ['--', *pathspecs] if pathspecs else []
+    # Fast probe first: --quiet exits on the first differing byte, so
+    # no-op runs never materialize (or decode) a file list at all.
+    probe = subprocess.run(
+        ['git', 'diff', '--quiet', base_ref, 'HEAD', *scope])
+    if probe.returncode == 0:
+        return ()
+    # ACDMRT keeps every status that can affect a rebuild — including
+    # deletions, since removing a file changes the image — and drops
+    # unmerged/broken noise before it ever reaches Python.
+    cmd = ['git', 'diff', '--name-only', '-z', '--diff-filter=ACDMRT',
+           base_ref, 'HEAD', *scope]
+    # Stream the output instead of buffering it whole: large diffs are
+    # split into paths chunk by chunk as git produces them.
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE)
+    files = []
+    pending = b''
+    for chunk in iter(lambda: proc.stdout.read(65536), b''):
+        # Only stitch when a path straddles the chunk boundary; chunks
+        # that end exactly on a NUL pass through uncopied.
+        if pending:
+            chunk = pending + chunk
+        parts = chunk.split(b'\0')
+        pending = parts.pop()
+        files.extend(part for part in parts if part)
+    proc.stdout.close()
+    if pending:
+        files.append(pending)
+    returncode = proc.wait()
+    if returncode != 0:
+        raise subprocess.CalledProcessError(returncode, cmd)
+    return tuple(files)
+
+
+def _get_changed_files(base_ref, pathspecs=None):
+    """Return the files changed between ``base_ref`` and HEAD, as bytes.
+
+    When ``pathspecs`` is given the diff is scoped to those paths, so the
+    filtering happens inside git instead of in Python.  Paths stay raw
+    bytes — git emits byte paths and classification never needs text.
+    """
+    return _diff_files(base_ref, tuple(pathspecs) if pathspecs else ())
+
+
+@functools.lru_cache(maxsize=None)
+def _build_prefix_matcher(prefixes):
+    """Compile one alternation over the configured directory prefixes.
+
+    A single anchored C-level scan classifies each diff path in one call
+    instead of a Python loop over components or directories.  Shorter
+    prefixes sort first so nested directories resolve to the shallowest
+    owner, matching the old component walk.
+    """
+    ordered = sorted(prefixes, key=len)
+    return re.compile(b'^(?:' + b'|'.join(map(re.escape, ordered)) + b')')
+
+
+def get_changed_files(base_ref, pathspecs=None):
+    """Changed byte paths between ``base_ref`` and HEAD, optionally scoped.
+
+    Callers that drive several detectors fetch the diff once over the
+    union of their roots and hand the list to each detector.
+    """
+    return _get_changed_files(base_ref, pathspecs)
+
+
+def _detect_changed(base_ref, byte_map, changed_files=None):
+    """Classify scoped diff output against a byte-prefix table.
+
+    ``byte_map`` maps trailing-slash byte prefixes to names, built once
+    by the detectors, so matching never leaves bytes and git's output is
+    never decoded.  When the caller already holds the changed-file list,
+    pass it to skip the diff.
+    """
+    if not byte_map:
+        return []
+    if changed_files is None:
+        changed_files = _get_changed_files(base_ref, tuple(byte_map))
+    # Once every configured name has matched, the rest of the diff can
+    # add nothing — typical for a handful of directories in a huge diff.
+    target = len(set(byte_map.values()))
+    changed = set()
+    if all(prefix.count(b'/') == 2 for prefix in byte_map):
+        # Every directory in this repo is exactly two components deep
+        # (base-images/<name>, docker/<service>), so a split plus one
+        # tuple-keyed dict get classifies a path in O(1) with no regex.
+        lookup = {tuple(prefix.split(b'/', 2)[:2]): name
+                  for prefix, name in byte_map.items()}
+        for file_path in changed_files:
+            parts = file_path.split(b'/', 2)
+            if len(parts) == 3:
+                name = lookup.get((parts[0], parts[1]))
+                if name is not None:
+                    changed.add(name)
+                    if len(changed) == target:
+                        break
+        return sorted(changed)
+    matcher = _build_prefix_matcher(tuple(byte_map))
+    for file_path in changed_files:
+        match = matcher.match(file_path)
+        if match is not None:
+            changed.add(byte_map[match.group(0)])
+            if len(changed) == target:
+                break
+    return sorted(changed)
+
+
+def detect_changed(base_ref, base_images, services,
+                   get_base_dir=lambda b: b['directory'],
+                   get_base_name=lambda b: b['name'],
+                   get_service_dir=lambda s: s['directory'],
+                   get_service_name=lambda s: s['name'],
+                   changed_files=None):
+    """Detect changed base images and services in one classification pass.
+
+    Both prefix tables merge into a single byte map whose values carry
+    the record kind, so git runs once and the diff is walked once for
+    both detectors.  Returns ``(base_image_names, service_names)``, each
+    sorted.
+    """
+    byte_map = {
+        f"{get_base_dir(b).rstrip('/')}/".encode(): (0, sys.intern(get_base_name(b)))
+        for b in base_images
+    }
+    byte_map.update(
+        (f"{get_service_dir(s).rstrip('/')}/".encode(), (1, sys.intern(get_service_name(s))))
+        for s in services
+    )
+    matched = _detect_changed(base_ref, byte_map, changed_files)
+    return (
+        [name for kind, name in matched if kind == 0],
+        [name for kind, name in matched if kind == 1],
+    )
+
+
+def detect_changed_base_images(base_ref, base_images,
+                               get_dir=lambda b: b['directory'],
+                               get_name=lambda b: b['name'],
+                               changed_files=None):
+    """Return names of base images whose directory has changes vs base_ref.
+
+    ``get_dir``/``get_name`` extract the repo-relative path and the name
+    from each record, so callers with differently shaped dicts pass
+    accessors instead of rebuilding the whole list.  ``changed_files`` is
+    an already-fetched diff (see get_changed_files).
+    """
+    # Normalized to a trailing-slash byte prefix once, outside the scan:
+    # a trailing slash also keeps base-images/node from owning
+    # base-images/node2 paths.
+    byte_map = {f"{get_dir(b).rstrip('/')}/".encode(): sys.intern(get_name(b))
+                for b in base_images}
+    return _detect_changed(base_ref, byte_map, changed_files)
+
+
+def detect_changed_services(base_ref, services,
+                            get_dir=lambda s: s['directory'],
+                            get_name=lambda s: s['name'],
+                            changed_files=None):
+    """Return names of services whose build context has changes vs base_ref.
+
+    ``get_dir``/``get_name`` extract the repo-relative build context and
+    the service name from each record (see detect_changed_base_images).
+    """
+    byte_map = {f"{get_dir(s).rstrip('/')}/".encode(): sys.intern(get_name(s))
+                for s in services}
+    return _detect_changed(base_ref, byte_map, changed_files)
+
+
+def validate_base_image_exact_copy(dockerfile_path):
+    """Raise ValidationError unless the Dockerfile is a bare upstream copy."""
+    # Raw bytes via os.open/os.read: a typical Dockerfile arrives in the
+    # first read, the keywords are ASCII and the anchored pattern
+    # ignores comment lines, so nothing is decoded unless a violation is
+    # reported.  os.open raises FileNotFoundError itself, preserving the
+    # missing-file contract.
+    fd = os.open(os.fspath(dockerfile_path), os.O_RDONLY)
+    try:
+        chunks = []
+        while chunk := os.read(fd, 1 << 16):
+            chunks.append(chunk)
+    finally:
+        os.close(fd)
+    content = b''.join(chunks)
+    match = _FORBIDDEN_RE.search(content)
+    if match:
+        raise ValidationError(
+            f"{match.group(1).decode('ascii').upper()} instruction not allowed "
+            f"in {dockerfile_path}: "
+            "base image Dockerfiles must be exact copies of upstream"
+        )
+
+
+def validate_base_images_exact_copy(dockerfile_paths):
+    """Validate several base-image Dockerfiles concurrently.
+
+    Each check is an independent read plus one scan; the GIL drops
+    during the reads, so a thread pool overlaps them.  The first
+    ValidationError propagates out of the pool unchanged.
+    """
+    paths = list(dockerfile_paths)
+    if len(paths) < 2:
+        for path in paths:
+            validate_base_image_exact_copy(path)
+        return
+    with ThreadPoolExecutor(max_workers=min(8, len(paths))) as executor:
+        for _ in executor.map(validate_base_image_exact_copy, paths):
+            pass
@@ -0,0 +1,118 @@
+"""Shared pytest fixtures for the CI helper scripts."""
+
+import sys
+import types
+from pathlib import Path
+
+import pytest
+
+# Make the scripts importable from the tests without packaging them.
+sys.path.insert(0, str(Path(__file__).parent))
+
+import base_images  # noqa: E402
+import change_detection  # noqa: E402
+import ghcr  # noqa: E402
+
+
+def _reset_caches():
+    change_detection._diff_files.cache_clear()
+    ghcr._exists_cache.clear()
+    ghcr._exists_cache_loaded = False
+    base_images._parse_cache.clear()
+    base_images._parse_cache_loaded = False
+
+
+@pytest.fixture(autouse=True)
+def clear_process_caches():
+    """Keep tests hermetic: the per-process caches persist otherwise."""
+    _reset_caches()
+    yield
+    _reset_caches()
+
+
+# The sample_* fixtures return immutable test data, so one object is
+# shared across the whole run (session scope) instead of being rebuilt
+# per test.
+@pytest.fixture(scope='session')
+def sample_dockerfile():
+    return (
+        'FROM ghcr.io/groupsky/homy/node-18-alpine:18.19.0-alpine AS builder\n'
+        'WORKDIR /app\n'
+        'COPY package.json .\n'
+        'RUN npm install\n'
+        '\n'
+        'FROM ghcr.io/groupsky/homy/node-18-alpine:18.19.0-alpine\n'
+        'WORKDIR /app\n'
+        'COPY --from=builder /app/node_modules ./node_modules\n'
+        'HEALTHCHECK --interval=30s --timeout=5s CMD node healthcheck.js\n'
+        'CMD ["node", "index.js"]\n'
+    )
+
+
+@pytest.fixture(scope='session')
+def sample_base_images_config():
+    return [
+        {'directory': 'base-images/node-18-alpine', 'name': 'node-18-alpine'},
+        {'directory': 'base-images/node-22-alpine', 'name': 'node-22-alpine'},
+        {'directory': 'base-images/alpine', 'name': 'alpine'},
+    ]
+
+
+@pytest.fixture(scope='session')
+def sample_docker_compose():
+    return {
+        'services': {
+            'broker': {
+                'build': 'docker/mosquitto',
+                'image': 'ghcr.io/groupsky/homy/mosquitto:latest',
+            },
+            'automations': {
+                'build': {
+                    'context': 'docker/automations',
+                    'dockerfile': 'Dockerfile',
+                },
+                'image': 'ghcr.io/groupsky/homy/automations:latest',
+            },
+            'external': {
+                'image': 'grafana/grafana:9.0.0',
+            },
+        },
+    }
+
+
+@pytest.fixture(scope='session')
+def sample_base_dockerfiles():
+    # Read-only view so no test can mutate the session-shared dict.
+    return types.MappingProxyType({
+        'node-18-alpine': 'FROM node:18.19.0-alpine3.19\n',
+        'node-22-alpine': 'FROM node:22.1.0-alpine3.19\n',
+        'alpine': 'FROM alpine:3.19\n',
+    })
+
+
+@pytest.fixture
+def base_images_dir(tmp_path, sample_base_dockerfiles):
+    """A base-images/ tree populated with the sample Dockerfiles."""
+    base_dir = tmp_path / 'base-images'
+    base_dir.mkdir()
+    for name, content in sample_base_dockerfiles.items():
+        image_dir = base_dir / name
+        image_dir.mkdir()
+        (image_dir / 'Dockerfile').write_text(content)
+    return base_dir
+
+
+@pytest.fixture
+def temp_repo(tmp_path, sample_base_dockerfiles):
+    """A repo-shaped tree with base-images/ and one service directory."""
+    for name, content in sample_base_dockerfiles.items():
+        image_dir = tmp_path / 'base-images' / name
+        image_dir.mkdir(parents=True)
+        (image_dir / 'Dockerfile').write_text(content)
+    service_dir = tmp_path / 'docker' / 'automations'
+    service_dir.mkdir(parents=True)
+    (service_dir / 'Dockerfile').write_text(
+        'FROM ghcr.io/groupsky/homy/node-18-alpine:18.19.0-alpine\n'
+        'CMD ["node", "index.js"]\n'
+    )
+    return tmp_path
@@ -0,0 +1,72 @@
+"""Reverse dependency mapping between base images and services.
+
+A service depends on a base image when its Dockerfile builds FROM the
+image's GHCR tag (directly or via ``COPY --from=``).
+"""
+
+import graphlib
+from collections import defaultdict
+from typing import Dict, List, Optional, Set
+
+from dockerfile_parser import parse_all
+
+
+def _image_name(reference) -> str:
+    """Strip the tag from an image reference."""
+    if ':' in reference:
+        return reference.rsplit(':', 1)[0]
+    return reference
+
+
+def build_reverse_dependency_map(services, ghcr_to_dir,
+                                 dockerfiles: Dict[str, Optional[str]]) -> Dict[str, List[str]]:
+    """Map base-image directory -> services whose Dockerfile uses it.
+
+    ``dockerfiles`` maps service name to its already-read Dockerfile
+    content (None when the file is missing), so the caller's cached reads
+    are reused instead of re-opening every file here.
+    """
+    name_to_dir = {_image_name(tag): directory for tag, directory in ghcr_to_dir.items()}
+    reverse_deps = defaultdict(set)
+    for service in services:
+        content = dockerfiles.get(service['service_name'])
+        if content is None:
+            continue
+        parsed = parse_all(content)
+        references = set(parsed.copy_from_external)
+        if parsed.final_stage_base:
+            references.add(parsed.final_stage_base)
+        for reference in references:
+            base_dir = name_to_dir.get(_image_name(reference))
+            if base_dir is not None:
+                reverse_deps[base_dir].add(service['service_name'])
+    return {base_dir: sorted(names) for base_dir, names in reverse_deps.items()}
+
+
+def build_affected_closure(reverse_deps) -> Dict[str, Set[str]]:
+    """Transitive closure of the reverse dependency map.
+
+    When a dependent is itself a key (a base image layered on another base
+    image), its own dependents are folded in, so ``closure[base_dir]`` is
+    everything that must rebuild when ``base_dir`` changes.  Nodes are
+    visited in topological order, so each edge is walked exactly once;
+    a dependency cycle raises graphlib.CycleError.
+    """
+    order = graphlib.TopologicalSorter(reverse_deps).static_order()
+    closure = {}
+    for node in order:
+        direct = reverse_deps.get(node)
+        if direct is None:
+            continue
+        reachable = set(direct)
+        for dependent in direct:
+            reachable.update(closure.get(dependent, ()))
+        closure[node] = reachable
+    return closure
+
+
+def detect_affected_services(changed_base_dirs, reverse_deps) -> List[str]:
+    """Services that must rebuild because their base image changed."""
+    closure = build_affected_closure(reverse_deps)
+    return sorted(set().union(
+        *(closure[d] for d in changed_base_dirs if d in closure)))
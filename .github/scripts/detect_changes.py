@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""Entry point for the detect-changes CI job.
+
+Works out which base images and services need rebuilding for the current
+push or pull request and writes the result to ``$GITHUB_OUTPUT``.
+"""
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from base_images import build_directory_to_ghcr_mapping, discover_base_images
+from change_detection import detect_changed, get_changed_files
+from dependency_graph import build_reverse_dependency_map, detect_affected_services
+from dockerfile_parser import parse_all
+from ghcr import check_all_services
+from services import discover_services_from_compose
+from validation import has_real_tests
+
+# Matches node base images ("node:18-alpine", ".../node-18-alpine:...")
+# without lowercasing a copy of every reference first.
+_NODE_BASE_RE = re.compile(r'\bnode\b', re.IGNORECASE)
+
+REQUIRED_OUTPUT_KEYS = (
+    'changed_base_images',
+    'changed_services',
+    'affected_services',
+    'services_to_build',
+    'services_to_skip',
+    'healthcheck_services',
+    'version_check_services',
+    'test_services',
+)
+
+_REQUIRED_SET = frozenset(REQUIRED_OUTPUT_KEYS)
+
+#: Compact encoder shared by every output key: no per-call encoder setup
+#: and no ", "/": " padding written to $GITHUB_OUTPUT.
+_encode = json.JSONEncoder(separators=(',', ':'), ensure_ascii=False).encode
+
+
+def _read_service_files(services) -> dict:
+    """Read every service's Dockerfile and package.json concurrently.
+
+    Returns service name -> (dockerfile_content, package_json_content),
+    with None for files that do not exist.  The GIL is released during
+    file reads, so a thread pool overlaps the syscalls.
+    """
+    def read_one(service):
+        dockerfile_path = Path(service['dockerfile_path'])
+        dockerfile_content = (
+            dockerfile_path.read_text() if dockerfile_path.exists() else None
+        )
+        package_json_path = Path(service['build_context']) / 'package.json'
+        package_json_content = (
+            package_json_path.read_text() if package_json_path.exists() else None
+        )
+        return service['service_name'], (dockerfile_content, package_json_content)
+
+    if not services:
+        return {}
+    with ThreadPoolExecutor(max_workers=min(32, len(services))) as executor:
+        return dict(executor.map(read_one, services))
+
+
+def _rev_parse(ref) -> str:
+    return subprocess.check_output(['git', 'rev-parse', ref], text=True).strip()
+
+
+def _detection_cache_path(base_sha, head_sha) -> Path:
+    """Cache file for one (base, head) commit pair, kept under .git/."""
+    return Path('.git') / 'detect-changes-cache' / f'{base_sha}-{head_sha}.json'
+
+
+def generate_outputs(detection_result) -> dict:
+    """Serialize every required key of the detection result to JSON."""
+    return {key: _encode(detection_result.get(key, []))
+            for key in REQUIRED_OUTPUT_KEYS}
+
+
+def validate_outputs(outputs):
+    """Fail loudly when an expected workflow output is missing."""
+    missing_keys = _REQUIRED_SET.difference(outputs)
+    if missing_keys:
+        raise ValueError(f'missing output keys: {sorted(missing_keys)}')
+
+
+def _format_output(key, value) -> str:
+    """One output assignment; heredoc form for multi-line values."""
+    if '\n' in value:
+        return f'{key}<<GITHUB_OUTPUT_EOF\n{value}\nGITHUB_OUTPUT_EOF\n'
+    return f'{key}={value}\n'
+
+
+def write_github_output(outputs, output_file):
+    """Append the outputs to the GitHub Actions output file in one write."""
+    with open(output_file, 'a') as f:
+        f.write(''.join(_format_output(key, value)
+                        for key, value in outputs.items()))
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--base-ref', required=True,
+                        help='git ref to diff against (e.g. origin/master)')
+    parser.add_argument('--base-images-dir', default='base-images')
+    parser.add_argument('--compose-file', default='docker-compose.yml')
+    parser.add_argument('--github-output', default=os.environ.get('GITHUB_OUTPUT'))
+    args = parser.parse_args(argv)
+
+    # Step 1: discover base images.
+    base_images = discover_base_images(args.base_images_dir)
+
+    # Step 2: discover GHCR-published services from the compose file.
+    services = discover_services_from_compose(args.compose_file)
+
+    # Every later step works on file contents, so read each service's
+    # Dockerfile and package.json exactly once up front (thread pool, the
+    # reads are I/O-bound) and classify from the cached strings.
+    service_files = _read_service_files(services)
+    dockerfiles = {name: files[0] for name, files in service_files.items()}
+
+    # Steps 3-8 depend only on the pair of commits being compared, so
+    # their result is cached on disk keyed by the resolved SHAs.  Re-runs
+    # of the workflow against the same commits (retries, matrix jobs)
+    # skip the git diffs and dependency propagation entirely.
+    head_sha = _rev_parse('HEAD')
+    cache_path = _detection_cache_path(_rev_parse(args.base_ref), head_sha)
+    try:
+        cached = json.loads(cache_path.read_text())
+    except (FileNotFoundError, json.JSONDecodeError):
+        cached = None
+
+    if cached is not None:
+        changed_base_images = cached['changed_base_images']
+        changed_services = cached['changed_services']
+        affected_services = cached['affected_services']
+    else:
+        # Step 3: one git diff over the union of all watched roots; both
+        # detectors partition the same in-memory list.
+        roots = [args.base_images_dir,
+                 *(s['build_context'] for s in services)]
+        changed_files = get_changed_files(args.base_ref, roots)
+
+        # Steps 4+5: classify base images and services in one fused pass
+        # over the shared diff.  The accessors adapt the discovery
+        # records in place instead of rebuilding them.
+        changed_base_images, changed_services = detect_changed(
+            args.base_ref, base_images, services,
+            get_service_dir=lambda s: s['build_context'],
+            get_service_name=lambda s: s['service_name'],
+            changed_files=changed_files)
+
+        # Step 6: map base-image directories to GHCR tags.
+        mapping = build_directory_to_ghcr_mapping(args.base_images_dir, base_images)
+
+        # Step 7: build the reverse dependency map.
+        reverse_deps = build_reverse_dependency_map(
+            services, mapping['ghcr_to_dir'], dockerfiles)
+
+        # Step 8: propagate base-image changes to dependent services.
+        changed_names = set(changed_base_images)
+        changed_base_dirs = [
+            b['directory'] for b in base_images if b['name'] in changed_names
+        ]
+        affected_services = detect_affected_services(changed_base_dirs, reverse_deps)
+
+        # Write atomically so a killed run never leaves a truncated entry.
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = cache_path.with_suffix('.tmp')
+        tmp_path.write_text(json.dumps({
+            'changed_base_images': changed_base_images,
+            'changed_services': changed_services,
+            'affected_services': affected_services,
+        }))
+        os.replace(tmp_path, cache_path)
+
+    # Step 9: find services with a real test suite.
+    test_services = []
+    for service in services:
+        package_json_content = service_files[service['service_name']][1]
+        if package_json_content is None:
+            continue
+        if has_real_tests(json.loads(package_json_content)):
+            test_services.append(service['service_name'])
+
+    # Step 10: find services whose image defines a healthcheck.
+    healthcheck_services = []
+    for service in services:
+        dockerfile_content = service_files[service['service_name']][0]
+        if dockerfile_content is not None and parse_all(dockerfile_content).has_healthcheck:
+            healthcheck_services.append(service['service_name'])
+
+    # Step 11: node-based services additionally get a version check.
+    # Services share a handful of base images, so memoize the regex test
+    # per unique reference.
+    version_check_services = []
+    is_node_base = {}
+    for service in services:
+        dockerfile_content = service_files[service['service_name']][0]
+        if dockerfile_content is None:
+            continue
+        base_image = parse_all(dockerfile_content).final_stage_base
+        if not base_image:
+            continue
+        if base_image not in is_node_base:
+            is_node_base[base_image] = _NODE_BASE_RE.search(base_image) is not None
+        if is_node_base[base_image]:
+            version_check_services.append(service['service_name'])
+
+    # Step 12: probe GHCR so already-published images are not rebuilt.
+    check_set = set(changed_services).union(affected_services)
+    services_to_check = [s for s in services if s['service_name'] in check_set]
+    services_to_build, services_to_skip = check_all_services(
+        services_to_check, head_sha)
+
+    # Step 13: publish the results to the workflow.
+    detection_result = {
+        'changed_base_images': changed_base_images,
+        'changed_services': changed_services,
+        'affected_services': affected_services,
+        'services_to_build': services_to_build,
+        'services_to_skip': services_to_skip,
+        'healthcheck_services': healthcheck_services,
+        'version_check_services': version_check_services,
+        'test_services': test_services,
+    }
+    outputs = generate_outputs(detection_result)
+    validate_outputs(outputs)
+    if args.github_output:
+        write_github_output(outputs, args.github_output)
+    for key, value in outputs.items():
+        print(f'{key}={value}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,273 @@
+"""Dockerfile parsing helpers.
+
+All functions take the Dockerfile content as a string so callers control
+how files are read; nothing here touches the filesystem.  The files are
+a handful of lines each, so a compiled-regex scan beats a general
+Dockerfile parser by a wide margin.
+"""
+
+import functools
+import re
+import shlex
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from errors import ValidationError
+
+# Unfold backslash line continuations before scanning.
+_CONT_RE = re.compile(r'\\[ \t]*\r?\n\s*')
+# One instruction per remaining line; comment lines never match.
+_INSTR_RE = re.compile(r'(?m)^[ \t]*([A-Za-z]+)(?:[ \t]+(.*))?$')
+# Captures (platform, image, stage) of a FROM value in one match.
+_FROM_VALUE_RE = re.compile(
+    r'(?:--platform=(\S+)\s+)?(\S+)(?:\s+AS\s+(\S+))?', re.IGNORECASE)
+
+
+@dataclass(frozen=True)
+class ParsedDockerfile:
+    """Every per-Dockerfile fact the workflow needs, parsed once."""
+    from_lines: Tuple[Dict, ...]
+    final_stage_base: Optional[str]
+    has_healthcheck: bool
+    copy_from_external: Tuple[str, ...]
+
+
+@functools.lru_cache(maxsize=256)
+def _parse_structure(dockerfile_content) -> Tuple[Dict, ...]:
+    """Scan content into (instruction, value) dicts, cached.
+
+    Every public helper needs this structure and a caller typically
+    invokes several of them back-to-back on the same content, so the
+    scan runs once per unique Dockerfile instead of once per call.
+    """
+    unfolded = _CONT_RE.sub(' ', dockerfile_content)
+    return tuple(
+        {'instruction': match.group(1).upper(),
+         'value': (match.group(2) or '').rstrip()}
+        for match in _INSTR_RE.finditer(unfolded)
+    )
+
+
+def _structure(dockerfile_content) -> Tuple[Dict, ...]:
+    # Keep empty content out of the cache; it is a common placeholder.
+    if not dockerfile_content:
+        return ()
+    return _parse_structure(dockerfile_content)
+
+
+def parse_from_lines(dockerfile_content) -> Tuple[Dict, ...]:
+    """Return one dict per FROM instruction: platform, image and stage.
+
+    The result is a read-only tuple — callers only iterate it, and
+    tuples feed straight into the lru_cache-keyed helpers.
+    """
+    if not dockerfile_content:
+        return ()
+    result = []
+    for instruction in _structure(dockerfile_content):
+        if instruction['instruction'] != 'FROM':
+            continue
+        match = _FROM_VALUE_RE.match(instruction['value'])
+        if not match:
+            continue
+        platform, image, stage = match.group(1, 2, 3)
+        if image.startswith('--'):
+            # A bare flag with no image is malformed; skip it.
+            continue
+        result.append({'platform': platform, 'image': image, 'stage': stage})
+    return tuple(result)
+
+
+@functools.lru_cache(maxsize=256)
+def _resolved_stage_base(stage_items) -> Dict[str, Optional[str]]:
+    """Resolve every stage name to its terminal external base, at once.
+
+    ``stage_items`` is a sorted tuple of (stage, image) pairs (hashable,
+    so related Dockerfiles sharing the same stages reuse the result).
+    Classic path compression: each walk writes the terminal back to every
+    node on the path, so each stage is resolved once.  Cycles resolve to
+    None.
+    """
+    stage_map = dict(stage_items)
+    resolved = {}
+    for key in stage_map:
+        path = []
+        current = key
+        while True:
+            if current in resolved:
+                terminal = resolved[current]
+                break
+            if current in path:
+                terminal = None
+                break
+            if current not in stage_map:
+                terminal = current
+                break
+            path.append(current)
+            current = stage_map[current]
+        for node in path:
+            resolved[node] = terminal
+    return resolved
+
+
+def extract_final_stage_base(dockerfile_content) -> Optional[str]:
+    """Resolve the external image the final build stage is based on.
+
+    Stage references (``FROM builder``) are followed through the stage map
+    until an external image is reached.
+    """
+    from_lines = parse_from_lines(dockerfile_content)
+    if not from_lines:
+        return None
+    stage_items = tuple(sorted(
+        (line['stage'], line['image']) for line in from_lines if line['stage']
+    ))
+    final_image = from_lines[-1]['image']
+    resolved = _resolved_stage_base(stage_items)
+    return resolved.get(final_image, final_image)
+
+
+def has_healthcheck(dockerfile_content) -> bool:
+    """True when the final stage defines a real HEALTHCHECK.
+
+    ``HEALTHCHECK NONE`` counts as no healthcheck.
+    """
+    if not dockerfile_content:
+        return False
+    # Most services define no healthcheck at all; a C-level substring
+    # scan rejects those without tokenizing a single instruction.
+    if 'HEALTHCHECK' not in dockerfile_content and 'healthcheck' not in dockerfile_content:
+        return False
+    # Scan backwards: the first HEALTHCHECK seen before hitting a FROM is
+    # the final stage's (and the one docker applies), so the walk stops
+    # without locating the last FROM in a separate pass.
+    for instruction in reversed(_structure(dockerfile_content)):
+        if instruction['instruction'] == 'FROM':
+            break
+        if instruction['instruction'] == 'HEALTHCHECK':
+            return instruction['value'].strip().upper() != 'NONE'
+    return False
+
+
+# HEALTHCHECK flag -> result field, consulted after one partition('=').
+_HC_FLAGS = {
+    '--interval': 'interval',
+    '--timeout': 'timeout',
+    '--start-period': 'start_period',
+    '--retries': 'retries',
+}
+
+
+def parse_healthcheck_params(dockerfile_content) -> Optional[Dict]:
+    """Extract the flags and command of the final stage's HEALTHCHECK.
+
+    Returns None when there is no healthcheck (or it is ``NONE``).
+    """
+    if not dockerfile_content:
+        return None
+    if 'HEALTHCHECK' not in dockerfile_content and 'healthcheck' not in dockerfile_content:
+        return None
+    value = None
+    for instruction in reversed(_structure(dockerfile_content)):
+        if instruction['instruction'] == 'FROM':
+            break
+        if instruction['instruction'] == 'HEALTHCHECK':
+            value = instruction['value']
+            break
+    if value is None or value.strip().upper() == 'NONE':
+        return None
+    parts = shlex.split(value)
+    result = {
+        'interval': None,
+        'timeout': None,
+        'start_period': None,
+        'retries': None,
+        'cmd': None,
+    }
+    for i, part in enumerate(parts):
+        if part.upper() == 'CMD':
+            result['cmd'] = ' '.join(parts[i + 1:])
+            break
+        flag, eq, flag_value = part.partition('=')
+        field = _HC_FLAGS.get(flag)
+        if eq and field:
+            result[field] = flag_value
+    return result
+
+
+def extract_copy_from_external(dockerfile_content) -> Tuple[str, ...]:
+    """List images referenced via ``COPY --from=`` that are not stages.
+
+    Stage names and COPY sources are collected in one pass over the
+    structure; the stage filter is applied at the end since a stage is
+    always declared before it can be copied from.
+    """
+    if not dockerfile_content or '--from=' not in dockerfile_content:
+        return ()
+    stage_names = set()
+    sources = []
+    for instruction in _structure(dockerfile_content):
+        instr = instruction['instruction']
+        if instr == 'FROM':
+            parts = instruction['value'].split()
+            if len(parts) >= 3 and parts[-2].upper() == 'AS':
+                stage_names.add(parts[-1])
+        elif instr == 'COPY':
+            for part in instruction['value'].split():
+                if part.startswith('--from='):
+                    sources.append(part[len('--from='):])
+                    break
+    return tuple(source for source in sources
+                 if source not in stage_names and not source.isdigit())
+
+
+def validate_no_arg_in_from(dockerfile_content):
+    """Raise ValidationError when a FROM line uses ARG substitution.
+
+    Change detection resolves FROM lines statically, so build-time
+    variables in them would silently break dependency tracking.
+    """
+    for line in parse_from_lines(dockerfile_content):
+        if '$' in line['image']:
+            raise ValidationError(
+                f"FROM references a build argument ({line['image']}): "
+                "base images must be referenced statically"
+            )
+
+
+def parse_base_image_dockerfile(dockerfile_content) -> Optional[Dict]:
+    """Break the first FROM of a base-image Dockerfile into its parts."""
+    from_lines = parse_from_lines(dockerfile_content)
+    if not from_lines:
+        return None
+    upstream_image = from_lines[0]['image']
+    # Strip a registry prefix (contains a dot, a port or is localhost).
+    head, _, rest = upstream_image.partition('/')
+    if rest and ('.' in head or ':' in head or head == 'localhost'):
+        body = rest
+    else:
+        body = upstream_image
+    image_name, sep, version_tag = body.rpartition(':')
+    if not sep:
+        image_name, version_tag = body, None
+    return {
+        'upstream_image': upstream_image,
+        'image_name': image_name,
+        'version_tag': version_tag,
+    }
+
+
+@functools.lru_cache(maxsize=None)
+def parse_all(dockerfile_content) -> ParsedDockerfile:
+    """Parse a Dockerfile once, caching every derived fact by content.
+
+    The same content is parsed by several workflow steps (dependency
+    mapping, healthcheck check, version check); the cache makes the
+    repeat lookups free.
+    """
+    return ParsedDockerfile(
+        from_lines=parse_from_lines(dockerfile_content),
+        final_stage_base=extract_final_stage_base(dockerfile_content),
+        has_healthcheck=has_healthcheck(dockerfile_content),
+        copy_from_external=extract_copy_from_external(dockerfile_content),
+    )
@@ -0,0 +1,5 @@
+"""Shared exceptions for the CI helper scripts."""
+
+
+class ValidationError(Exception):
+    """Raised when a service or base image breaks a packaging convention."""
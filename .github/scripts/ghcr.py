@@ -0,0 +1,259 @@
+"""GHCR registry queries used by the detect-changes workflow."""
+
+import atexit
+import json
+import os
+import re
+import shutil
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import requests
+
+from errors import ValidationError
+
+GHCR_IMAGE_PREFIX = 'ghcr.io/groupsky/homy/'
+
+#: Shared keep-alive session: one TLS handshake for all manifest probes.
+_session = requests.Session()
+
+#: Registry bearer tokens by repository, fetched once each.
+_token_cache: Dict[str, str] = {}
+
+#: Existence results by full tag; several call sites ask about the same
+#: base images, so each tag hits the network at most once per process.
+#: Set GHCR_CACHE_FILE to persist the results across steps of one job.
+_exists_cache: Dict[str, bool] = {}
+_exists_cache_loaded = False
+
+
+def _load_exists_cache():
+    global _exists_cache_loaded
+    if _exists_cache_loaded:
+        return
+    _exists_cache_loaded = True
+    cache_file = os.environ.get('GHCR_CACHE_FILE')
+    if not cache_file:
+        return
+    try:
+        with open(cache_file) as f:
+            _exists_cache.update(json.load(f))
+    except (FileNotFoundError, json.JSONDecodeError):
+        pass
+    atexit.register(_save_exists_cache)
+
+
+def _save_exists_cache():
+    cache_file = os.environ.get('GHCR_CACHE_FILE')
+    if cache_file:
+        with open(cache_file, 'w') as f:
+            json.dump(_exists_cache, f)
+
+_MANIFEST_ACCEPT = (
+    'application/vnd.oci.image.index.v1+json,'
+    'application/vnd.docker.distribution.manifest.v2+json'
+)
+
+# Classification of docker stderr, compiled once at import.
+_NOT_FOUND_RE = re.compile(
+    r'manifest unknown|not found|manifest_unknown|'
+    r'requested access to the resource is denied',
+    re.IGNORECASE,
+)
+_TRANSIENT_RE = re.compile(
+    r'timeout|connection refused|temporary failure|i/o timeout',
+    re.IGNORECASE,
+)
+_RATE_RE = re.compile(r'toomanyrequests|rate limit', re.IGNORECASE)
+
+# Full shape of one of our GHCR tags, validated in one scan.
+_GHCR_TAG_RE = re.compile(
+    r'ghcr\.io/groupsky/homy/[A-Za-z0-9._/-]+:[A-Za-z0-9._-]+')
+
+
+class GHCRRateLimitError(Exception):
+    """Raised when GHCR rejects requests due to rate limiting."""
+
+
+def _is_valid_ghcr_tag(image_tag) -> bool:
+    """True when image_tag looks like one of our GHCR tags."""
+    return bool(image_tag) and _GHCR_TAG_RE.fullmatch(image_tag) is not None
+
+
+def _replace_tag_with_sha(image, sha) -> str:
+    """Re-tag an image reference with a commit sha."""
+    if not image:
+        return ''
+    if ':' in image:
+        image = image.rsplit(':', 1)[0]
+    return f'{image}:{sha}'
+
+
+def _split_image_tag(image_tag) -> Tuple[str, str]:
+    """Split ``ghcr.io/<repository>:<tag>`` into (repository, tag)."""
+    repository, _, tag = image_tag[len('ghcr.io/'):].rpartition(':')
+    return repository, tag
+
+
+def _ghcr_token(repository) -> str:
+    """Fetch (once per repository) a pull-scoped registry token.
+
+    Anonymous tokens work for public images; ``GITHUB_TOKEN`` is used
+    when available so rate limits apply to the workflow's identity.
+    """
+    token = _token_cache.get(repository)
+    if token is None:
+        github_token = os.environ.get('GITHUB_TOKEN')
+        response = _session.get(
+            'https://ghcr.io/token',
+            params={'scope': f'repository:{repository}:pull'},
+            auth=('', github_token) if github_token else None,
+            timeout=30,
+        )
+        response.raise_for_status()
+        token = response.json()['token']
+        _token_cache[repository] = token
+    return token
+
+
+def _check_image_exists_docker(image_tag, retries=3) -> bool:
+    """Existence probe via ``docker buildx imagetools inspect``.
+
+    Kept as a fallback for environments where direct registry access is
+    blocked (set ``FORCE_DOCKER_INSPECT``); forks a Go binary per call,
+    so the HTTP path is preferred.
+    """
+    delay = 1
+    last_error = ''
+    for attempt in range(retries):
+        result = subprocess.run(
+            ['docker', 'buildx', 'imagetools', 'inspect', image_tag],
+            capture_output=True,
+            text=True,
+            timeout=30,
+        )
+        if result.returncode == 0:
+            return True
+        if _NOT_FOUND_RE.search(result.stderr):
+            return False
+        if _RATE_RE.search(result.stderr):
+            raise GHCRRateLimitError(f'GHCR rate limit hit checking {image_tag}')
+        last_error = result.stderr.strip()
+        if _TRANSIENT_RE.search(result.stderr) and attempt < retries - 1:
+            time.sleep(delay)
+            delay *= 2
+            continue
+        break
+    raise RuntimeError(f'unexpected error checking {image_tag}: {last_error}')
+
+
+def check_image_exists(image_tag, retries=3) -> bool:
+    """Check whether ``image_tag`` has a published manifest on GHCR.
+
+    Probes the registry HTTP API directly over a shared keep-alive
+    session — no subprocess fork or per-call TLS handshake.  Transient
+    failures are retried with exponential backoff; rate limiting
+    surfaces as GHCRRateLimitError so the workflow can decide to rebuild
+    rather than hammer the registry.  Results are memoized per tag (and
+    optionally persisted, see GHCR_CACHE_FILE).
+    """
+    _load_exists_cache()
+    cached = _exists_cache.get(image_tag)
+    if cached is not None:
+        return cached
+    if os.environ.get('FORCE_DOCKER_INSPECT') and shutil.which('docker'):
+        exists = _check_image_exists_docker(image_tag, retries)
+        _exists_cache[image_tag] = exists
+        return exists
+    repository, tag = _split_image_tag(image_tag)
+    delay = 1
+    last_error = ''
+    for attempt in range(retries):
+        try:
+            response = _session.head(
+                f'https://ghcr.io/v2/{repository}/manifests/{tag}',
+                headers={
+                    'Authorization': f'Bearer {_ghcr_token(repository)}',
+                    'Accept': _MANIFEST_ACCEPT,
+                },
+                timeout=30,
+            )
+        except requests.RequestException as exc:
+            last_error = str(exc)
+        else:
+            if response.status_code == 200:
+                _exists_cache[image_tag] = True
+                return True
+            if response.status_code == 404:
+                _exists_cache[image_tag] = False
+                return False
+            if response.status_code in (429, 503):
+                raise GHCRRateLimitError(
+                    f'GHCR rate limit hit checking {image_tag}')
+            last_error = f'HTTP {response.status_code}'
+        if attempt < retries - 1:
+            time.sleep(delay)
+            delay *= 2
+    raise RuntimeError(f'unexpected error checking {image_tag}: {last_error}')
+
+
+def _safe_check(image_tag) -> Tuple[bool, Optional[Exception]]:
+    """Existence probe safe to run from a worker thread.
+
+    Returns (exists, error); errors are captured rather than raised so
+    the caller can route failed probes to the rebuild list.
+    """
+    if not _is_valid_ghcr_tag(image_tag):
+        return False, None
+    try:
+        return check_image_exists(image_tag), None
+    except (RuntimeError, GHCRRateLimitError) as exc:
+        # When in doubt, rebuild: a spurious build beats a missing image.
+        return False, exc
+
+
+def check_all_services(services, sha) -> Tuple[List[str], List[str]]:
+    """Split services into (to_build, to_skip) by GHCR tag existence.
+
+    The probes are network-latency-bound (subprocess.run releases the
+    GIL), so they fan out over a thread pool; executor.map keeps the
+    results in input order.
+    """
+    if not services:
+        return [], []
+    image_tags = [_replace_tag_with_sha(s.get('image', ''), sha) for s in services]
+    to_build = []
+    to_skip = []
+    with ThreadPoolExecutor(max_workers=min(16, len(services))) as executor:
+        results = executor.map(_safe_check, image_tags)
+        for service, (exists, _error) in zip(services, results):
+            if exists:
+                to_skip.append(service['service_name'])
+            else:
+                to_build.append(service['service_name'])
+    return to_build, to_skip
+
+
+def validate_fork_pr_base_images(base_images_needed):
+    """Ensure every base image a fork PR needs is already published.
+
+    Fork PRs cannot push to GHCR, so any base image they change must
+    already exist upstream.
+    """
+    missing_images = []
+    # Several services usually share a base image; check each tag once
+    # (dict.fromkeys keeps the first-seen order for the error message).
+    for image_tag in dict.fromkeys(base_images_needed):
+        try:
+            exists = check_image_exists(image_tag)
+        except (RuntimeError, GHCRRateLimitError):
+            exists = False
+        if not exists:
+            missing_images.append(image_tag)
+    if missing_images:
+        raise ValidationError(
+            'base images missing from GHCR (fork PRs cannot publish them): '
+            + ', '.join(missing_images)
+        )
@@ -0,0 +1,105 @@
+"""Tests for base_images.py."""
+
+from base_images import (
+    build_directory_to_ghcr_mapping,
+    discover_base_images,
+    normalize_ghcr_tag,
+    parse_base_dockerfile,
+)
+
+
+class TestParseBaseDockerfile:
+
+    def test_parse_simple_from(self, tmp_path):
+        dockerfile = tmp_path / 'Dockerfile'
+        dockerfile.write_text('FROM node:18.19.0-alpine3.19\n')
+        result = parse_base_dockerfile(dockerfile)
+        assert result == {
+            'upstream_image': 'node:18.19.0-alpine3.19',
+            'image_name': 'node',
+            'raw_version': '18.19.0-alpine3.19',
+        }
+
+    def test_parse_untagged_from(self, tmp_path):
+        dockerfile = tmp_path / 'Dockerfile'
+        dockerfile.write_text('FROM alpine\n')
+        result = parse_base_dockerfile(dockerfile)
+        assert result['image_name'] == 'alpine'
+        assert result['raw_version'] is None
+
+    def test_parse_skips_comments(self, tmp_path):
+        dockerfile = tmp_path / 'Dockerfile'
+        dockerfile.write_text('# FROM fake:1\nFROM alpine:3.19\n')
+        result = parse_base_dockerfile(dockerfile)
+        assert result['upstream_image'] == 'alpine:3.19'
+
+    def test_parse_no_from_returns_none(self, tmp_path):
+        dockerfile = tmp_path / 'Dockerfile'
+        dockerfile.write_text('# just a comment\n')
+        assert parse_base_dockerfile(dockerfile) is None
+
+
+class TestDiscoverBaseImages:
+
+    def test_discover_finds_all_images(self, base_images_dir):
+        result = discover_base_images(base_images_dir)
+        assert len(result) == 3
+        assert sorted(img['name'] for img in result) == [
+            'alpine', 'node-18-alpine', 'node-22-alpine',
+        ]
+
+    def test_discover_returns_empty_list_for_nonexistent_directory(self, tmp_path):
+        assert discover_base_images(tmp_path / 'missing') == []
+
+    def test_discover_skips_hidden_directories(self, base_images_dir):
+        hidden = base_images_dir / '.hidden'
+        hidden.mkdir()
+        (hidden / 'Dockerfile').write_text('FROM alpine:3.19\n')
+        result = discover_base_images(base_images_dir)
+        assert '.hidden' not in [img['name'] for img in result]
+
+    def test_discover_skips_directories_without_dockerfile(self, base_images_dir):
+        (base_images_dir / 'empty').mkdir()
+        result = discover_base_images(base_images_dir)
+        assert 'empty' not in [img['name'] for img in result]
+
+    def test_discover_records_directory_path(self, base_images_dir):
+        result = discover_base_images(base_images_dir)
+        alpine = next(img for img in result if img['name'] == 'alpine')
+        assert alpine['directory'].endswith('base-images/alpine')
+
+
+class TestNormalizeGhcrTag:
+
+    def test_plain_directory(self):
+        tag = normalize_ghcr_tag('alpine', '3.19')
+        assert tag == 'ghcr.io/groupsky/homy/alpine:3.19'
+
+    def test_node_alpine_patch_suffix_collapsed(self):
+        tag = normalize_ghcr_tag('node-18-alpine', '18.19.0-alpine3.19')
+        assert tag == 'ghcr.io/groupsky/homy/node-18-alpine:18.19.0-alpine'
+
+    def test_missing_version_falls_back_to_latest(self):
+        tag = normalize_ghcr_tag('alpine', None)
+        assert tag == 'ghcr.io/groupsky/homy/alpine:latest'
+
+
+class TestBuildDirectoryToGhcrMapping:
+
+    def test_mapping_contains_both_directions(self, base_images_dir):
+        mapping = build_directory_to_ghcr_mapping(base_images_dir)
+        assert len(mapping['dir_to_ghcr']) == 3
+        assert len(mapping['ghcr_to_dir']) == 3
+        for directory, tag in mapping['dir_to_ghcr'].items():
+            assert mapping['ghcr_to_dir'][tag] == directory
+
+    def test_mapping_empty_for_nonexistent_directory(self, tmp_path):
+        mapping = build_directory_to_ghcr_mapping(tmp_path / 'missing')
+        assert mapping == {'dir_to_ghcr': {}, 'ghcr_to_dir': {}}
+
+    def test_mapping_normalizes_node_alpine_tags(self, base_images_dir):
+        mapping = build_directory_to_ghcr_mapping(base_images_dir)
+        directory = str(base_images_dir / 'node-18-alpine')
+        assert mapping['dir_to_ghcr'][directory] == (
+            'ghcr.io/groupsky/homy/node-18-alpine:18.19.0-alpine'
+        )
@@ -0,0 +1,232 @@
+"""Tests for change_detection.py."""
+
+import io
+import subprocess
+import types
+from contextlib import contextmanager
+from unittest.mock import Mock, patch
+
+import pytest
+
+from change_detection import (
+    ValidationError,
+    detect_changed,
+    detect_changed_base_images,
+    detect_changed_services,
+    validate_base_image_exact_copy,
+    validate_base_images_exact_copy,
+)
+
+
+def _fake_rev_parse(cmd, **kwargs):
+    """Resolve each ref to a distinct fake SHA (base_ref != HEAD)."""
+    return ('sha-' + cmd[-1] + '\n').encode()
+
+
+@pytest.fixture
+def fake_git(monkeypatch):
+    """Plain-closure git stub for the hot tests.
+
+    Skips Mock's attribute tracking and call recording; set ``diff`` to
+    the NUL-separated byte output and inspect ``run_calls``/
+    ``popen_calls`` afterwards.  Mock-based tests remain where call
+    introspection matters.
+    """
+    state = types.SimpleNamespace(
+        diff=b'', quiet_returncode=1, run_calls=[], popen_calls=[])
+
+    def fake_run(cmd, **kwargs):
+        state.run_calls.append(cmd)
+        return types.SimpleNamespace(returncode=state.quiet_returncode)
+
+    def fake_popen(cmd, **kwargs):
+        state.popen_calls.append(cmd)
+        return types.SimpleNamespace(stdout=io.BytesIO(state.diff),
+                                     wait=lambda: 0)
+
+    monkeypatch.setattr('subprocess.check_output', _fake_rev_parse)
+    monkeypatch.setattr('subprocess.run', fake_run)
+    monkeypatch.setattr('subprocess.Popen', fake_popen)
+    return state
+
+
+@contextmanager
+def _git_diff(output, quiet_returncode=1):
+    """Patch rev-parse, the --quiet probe and the streamed diff."""
+    proc = Mock()
+    proc.stdout = io.BytesIO(output)
+    proc.wait.return_value = 0
+    with patch('subprocess.check_output', side_effect=_fake_rev_parse), \
+            patch('subprocess.run') as mock_run, \
+            patch('subprocess.Popen') as mock_popen:
+        mock_run.return_value = Mock(returncode=quiet_returncode)
+        mock_popen.return_value = proc
+        yield mock_run, mock_popen
+
+
+class TestDetectChangedBaseImages:
+
+    def test_detect_changed_base_images_single_change(self, sample_base_images_config):
+        git_output = b'base-images/node-18-alpine/Dockerfile\x00'
+        with _git_diff(git_output) as (mock_run, mock_popen):
+            result = detect_changed_base_images('origin/master', sample_base_images_config)
+        assert result == ['node-18-alpine']
+        mock_run.assert_called_once()
+        mock_popen.assert_called_once()
+        args = mock_popen.call_args[0][0]
+        assert 'diff' in args
+        assert '--name-only' in args
+        assert '-z' in args
+        assert '--diff-filter=ACDMRT' in args
+
+    def test_detect_changed_base_images_multiple_changes(
+            self, fake_git, sample_base_images_config):
+        fake_git.diff = (
+            b'base-images/node-18-alpine/Dockerfile\x00'
+            b'base-images/alpine/Dockerfile\x00'
+            b'README.md\x00'
+        )
+        result = detect_changed_base_images('origin/master', sample_base_images_config)
+        assert result == ['alpine', 'node-18-alpine']
+
+    def test_detect_changed_base_images_no_changes(
+            self, fake_git, sample_base_images_config):
+        fake_git.diff = b'README.md\x00'
+        result = detect_changed_base_images('origin/master', sample_base_images_config)
+        assert result == []
+
+    def test_detect_changed_base_images_quiet_fast_path(self, sample_base_images_config):
+        with patch('subprocess.check_output', side_effect=_fake_rev_parse), \
+                patch('subprocess.run') as mock_run:
+            mock_run.return_value = Mock(returncode=0)
+            result = detect_changed_base_images('origin/master', sample_base_images_config)
+        assert result == []
+        mock_run.assert_called_once()
+        assert '--quiet' in mock_run.call_args[0][0]
+
+    def test_detect_changed_base_images_same_commit_skips_diff(self, sample_base_images_config):
+        with patch('subprocess.check_output', return_value=b'same-sha\n'), \
+                patch('subprocess.run') as mock_run:
+            result = detect_changed_base_images('origin/master', sample_base_images_config)
+        assert result == []
+        mock_run.assert_not_called()
+
+    def test_detect_changed_base_images_git_error(self, sample_base_images_config):
+        with patch('subprocess.check_output', side_effect=_fake_rev_parse), \
+                patch('subprocess.run') as mock_run:
+            mock_run.side_effect = subprocess.CalledProcessError(128, 'git')
+            with pytest.raises(subprocess.CalledProcessError):
+                detect_changed_base_images('origin/master', sample_base_images_config)
+
+
+class TestDetectChangedServices:
+
+    def test_detect_changed_services_single_change(self, fake_git):
+        services = [
+            {'directory': 'docker/mosquitto', 'name': 'broker'},
+            {'directory': 'docker/automations', 'name': 'automations'},
+        ]
+        fake_git.diff = b'docker/mosquitto/broker.conf\x00'
+        result = detect_changed_services('origin/master', services)
+        assert result == ['broker']
+
+    def test_detect_changed_services_similar_prefix_not_matched(self, fake_git):
+        services = [{'directory': 'docker/mongo', 'name': 'mongo'}]
+        fake_git.diff = b'docker/mongo-express/config.js\x00'
+        result = detect_changed_services('origin/master', services)
+        assert result == []
+
+
+class TestSharedDiffCache:
+
+    def test_repeated_detection_shares_one_git_diff(self, sample_base_images_config):
+        git_output = b'base-images/alpine/Dockerfile\x00'
+        with _git_diff(git_output) as (mock_run, mock_popen):
+            assert detect_changed_base_images('origin/master', sample_base_images_config) == ['alpine']
+            assert detect_changed_base_images('origin/master', sample_base_images_config) == ['alpine']
+        mock_run.assert_called_once()
+        mock_popen.assert_called_once()
+
+    def test_precomputed_changed_files_skip_git(self, sample_base_images_config):
+        changed_files = [
+            b'base-images/alpine/Dockerfile',
+            b'docker/mosquitto/broker.conf',
+        ]
+        services = [{'directory': 'docker/mosquitto', 'name': 'broker'}]
+        with patch('subprocess.run') as mock_run, patch('subprocess.Popen') as mock_popen:
+            assert detect_changed_base_images(
+                'origin/master', sample_base_images_config,
+                changed_files=changed_files) == ['alpine']
+            assert detect_changed_services(
+                'origin/master', services, changed_files=changed_files) == ['broker']
+        mock_run.assert_not_called()
+        mock_popen.assert_not_called()
+
+    def test_diff_is_scoped_to_configured_directories(self, sample_base_images_config):
+        with patch('subprocess.check_output', side_effect=_fake_rev_parse), \
+                patch('subprocess.run') as mock_run:
+            mock_run.return_value = Mock(returncode=0)
+            detect_changed_base_images('origin/master', sample_base_images_config)
+        args = mock_run.call_args[0][0]
+        assert '--' in args
+        assert b'base-images/node-18-alpine/' in args
+
+
+class TestDetectChangedFused:
+
+    def test_single_pass_classifies_both_kinds(
+            self, fake_git, sample_base_images_config):
+        services = [{'directory': 'docker/mosquitto', 'name': 'broker'}]
+        fake_git.diff = (
+            b'base-images/alpine/Dockerfile\x00'
+            b'docker/mosquitto/broker.conf\x00'
+            b'README.md\x00'
+        )
+        bases, svcs = detect_changed(
+            'origin/master', sample_base_images_config, services)
+        assert bases == ['alpine']
+        assert svcs == ['broker']
+        assert len(fake_git.popen_calls) == 1
+
+
+class TestValidateBaseImageExactCopy:
+
+    def test_validate_base_image_exact_copy_passes(self, tmp_path):
+        dockerfile = tmp_path / 'Dockerfile'
+        dockerfile.write_text('# mirror of upstream\nFROM node:18.19.0-alpine3.19\n')
+        validate_base_image_exact_copy(dockerfile)
+
+    @pytest.mark.parametrize('instruction, keyword', [
+        ('RUN apk add curl', 'RUN'),
+        ('COPY script.sh /', 'COPY'),
+        ('ADD archive.tgz /', 'ADD'),
+        ('WORKDIR /app', 'WORKDIR'),
+        ('ENV NODE_ENV=production', 'ENV'),
+        ('HEALTHCHECK CMD true', 'HEALTHCHECK'),
+    ])
+    def test_validate_base_image_exact_copy_fails(self, tmp_path,
+                                                  instruction, keyword):
+        dockerfile = tmp_path / 'Dockerfile'
+        dockerfile.write_text(f'FROM node:18-alpine\n{instruction}\n')
+        with pytest.raises(ValidationError) as exc:
+            validate_base_image_exact_copy(dockerfile)
+        assert keyword in str(exc.value)
+        assert 'exact copies' in str(exc.value)
+
+    def test_validate_base_image_file_not_found(self, tmp_path):
+        with pytest.raises(FileNotFoundError):
+            validate_base_image_exact_copy(tmp_path / 'missing' / 'Dockerfile')
+
+    def test_validate_many_reports_the_offender(self, tmp_path):
+        paths = []
+        for i in range(5):
+            dockerfile = tmp_path / f'Dockerfile.{i}'
+            dockerfile.write_text('FROM alpine:3.19\n')
+            paths.append(dockerfile)
+        offender = tmp_path / 'Dockerfile.bad'
+        offender.write_text('FROM alpine:3.19\nRUN apk add curl\n')
+        paths.insert(2, offender)
+        with pytest.raises(ValidationError) as exc:
+            validate_base_images_exact_copy(paths)
+        assert 'Dockerfile.bad' in str(exc.value)
+        assert 'RUN' in str(exc.value)
@@ -0,0 +1,89 @@
+"""Tests for dependency_graph.py."""
+
+from dependency_graph import build_reverse_dependency_map, detect_affected_services
+
+
+def _service(name, dockerfile_content):
+    service = {
+        'service_name': name,
+        'build_context': f'docker/{name}',
+        'dockerfile_path': f'docker/{name}/Dockerfile',
+        'image': f'ghcr.io/groupsky/homy/{name}:latest',
+    }
+    return service, {name: dockerfile_content}
+
+
+class TestBuildReverseDependencyMap:
+
+    def test_direct_base_image_dependency(self):
+        service, dockerfiles = _service(
+            'automations',
+            'FROM ghcr.io/groupsky/homy/node-18-alpine:18.19.0-alpine\n',
+        )
+        ghcr_to_dir = {
+            'ghcr.io/groupsky/homy/node-18-alpine:18.19.0-alpine': 'base-images/node-18-alpine',
+        }
+        result = build_reverse_dependency_map([service], ghcr_to_dir, dockerfiles)
+        assert result == {'base-images/node-18-alpine': ['automations']}
+
+    def test_copy_from_dependency(self):
+        service, dockerfiles = _service(
+            'historian',
+            'FROM alpine:3.19\n'
+            'COPY --from=ghcr.io/groupsky/homy/tools:1.0 /tool /tool\n',
+        )
+        ghcr_to_dir = {'ghcr.io/groupsky/homy/tools:1.0': 'base-images/tools'}
+        result = build_reverse_dependency_map([service], ghcr_to_dir, dockerfiles)
+        assert result == {'base-images/tools': ['historian']}
+
+    def test_tag_mismatch_still_maps_by_name(self):
+        service, dockerfiles = _service(
+            'automations',
+            'FROM ghcr.io/groupsky/homy/node-18-alpine:18.20.0-alpine\n',
+        )
+        ghcr_to_dir = {
+            'ghcr.io/groupsky/homy/node-18-alpine:18.19.0-alpine': 'base-images/node-18-alpine',
+        }
+        result = build_reverse_dependency_map([service], ghcr_to_dir, dockerfiles)
+        assert result == {'base-images/node-18-alpine': ['automations']}
+
+    def test_unrelated_base_ignored(self):
+        service, dockerfiles = _service('broker', 'FROM eclipse-mosquitto:2\n')
+        assert build_reverse_dependency_map([service], {}, dockerfiles) == {}
+
+    def test_missing_dockerfile_skipped(self):
+        service, _ = _service('broker', '')
+        result = build_reverse_dependency_map([service], {}, {'broker': None})
+        assert result == {}
+
+
+class TestDetectAffectedServices:
+
+    def test_propagates_changed_base_dirs(self):
+        reverse_deps = {
+            'base-images/node-18-alpine': ['automations', 'historian'],
+            'base-images/alpine': ['broker'],
+        }
+        result = detect_affected_services(['base-images/node-18-alpine'], reverse_deps)
+        assert result == ['automations', 'historian']
+
+    def test_deduplicates_and_sorts(self):
+        reverse_deps = {
+            'base-images/a': ['svc-b', 'svc-a'],
+            'base-images/b': ['svc-a'],
+        }
+        result = detect_affected_services(['base-images/a', 'base-images/b'], reverse_deps)
+        assert result == ['svc-a', 'svc-b']
+
+    def test_unknown_dir_ignored(self):
+        assert detect_affected_services(['base-images/x'], {}) == []
+
+    def test_transitive_base_image_chain(self):
+        # alpine feeds node-18-alpine which feeds the service: changing
+        # alpine must rebuild the whole chain.
+        reverse_deps = {
+            'base-images/alpine': ['base-images/node-18-alpine'],
+            'base-images/node-18-alpine': ['automations'],
+        }
+        result = detect_affected_services(['base-images/alpine'], reverse_deps)
+        assert result == ['automations', 'base-images/node-18-alpine']
@@ -0,0 +1,67 @@
+"""Tests for the detect_changes.py output plumbing."""
+
+import pytest
+
+from detect_changes import (
+    REQUIRED_OUTPUT_KEYS,
+    _detection_cache_path,
+    generate_outputs,
+    validate_outputs,
+    write_github_output,
+)
+
+
+class TestDetectionCachePath:
+
+    def test_keyed_by_sha_pair_under_git_dir(self):
+        path = _detection_cache_path('abc123', 'def456')
+        assert path.parts[0] == '.git'
+        assert path.name == 'abc123-def456.json'
+
+
+class TestGenerateOutputs:
+
+    def test_all_keys_present(self):
+        outputs = generate_outputs({'changed_services': ['broker']})
+        assert set(outputs) == set(REQUIRED_OUTPUT_KEYS)
+
+    def test_values_are_json(self):
+        outputs = generate_outputs({'changed_services': ['broker']})
+        assert outputs['changed_services'] == '["broker"]'
+
+    def test_missing_keys_default_to_empty_list(self):
+        outputs = generate_outputs({})
+        assert outputs['changed_base_images'] == '[]'
+
+
+class TestValidateOutputs:
+
+    def test_complete_outputs_pass(self):
+        validate_outputs(generate_outputs({}))
+
+    def test_missing_key_raises(self):
+        outputs = generate_outputs({})
+        del outputs['changed_services']
+        with pytest.raises(ValueError):
+            validate_outputs(outputs)
+
+
+class TestWriteGithubOutput:
+
+    def test_writes_key_value_lines(self, tmp_path):
+        output_file = tmp_path / 'github_output'
+        write_github_output({'a': '[1]', 'b': '[]'}, output_file)
+        assert output_file.read_text() == 'a=[1]\nb=[]\n'
+
+    def test_appends_to_existing_file(self, tmp_path):
+        output_file = tmp_path / 'github_output'
+        output_file.write_text('existing=1\n')
+        write_github_output({'a': '[]'}, output_file)
+        assert output_file.read_text() == 'existing=1\na=[]\n'
+
+    def test_multiline_value_uses_heredoc(self, tmp_path):
+        output_file = tmp_path / 'github_output'
+        write_github_output({'a': 'line1\nline2'}, output_file)
+        assert output_file.read_text() == (
+            'a<<GITHUB_OUTPUT_EOF\nline1\nline2\nGITHUB_OUTPUT_EOF\n'
+        )
@@ -0,0 +1,174 @@
+"""Tests for dockerfile_parser.py."""
+
+import pytest
+
+from dockerfile_parser import (
+    extract_copy_from_external,
+    extract_final_stage_base,
+    has_healthcheck,
+    parse_base_image_dockerfile,
+    parse_from_lines,
+    parse_healthcheck_params,
+    validate_no_arg_in_from,
+)
+from errors import ValidationError
+
+
+class TestParseFromLines:
+
+    def test_single_from(self):
+        result = parse_from_lines('FROM node:18-alpine\n')
+        assert result == ({'platform': None, 'image': 'node:18-alpine', 'stage': None},)
+
+    def test_from_with_stage(self):
+        result = parse_from_lines('FROM node:18-alpine AS builder\n')
+        assert result[0]['stage'] == 'builder'
+
+    def test_from_with_platform(self):
+        result = parse_from_lines('FROM --platform=linux/amd64 node:18-alpine\n')
+        assert result[0]['platform'] == 'linux/amd64'
+        assert result[0]['image'] == 'node:18-alpine'
+
+    def test_multistage(self, sample_dockerfile):
+        result = parse_from_lines(sample_dockerfile)
+        assert len(result) == 2
+        assert result[0]['stage'] == 'builder'
+        assert result[1]['stage'] is None
+
+    def test_empty_content(self):
+        assert parse_from_lines('') == ()
+
+
+class TestExtractFinalStageBase:
+
+    def test_single_stage(self):
+        assert extract_final_stage_base('FROM node:18-alpine\n') == 'node:18-alpine'
+
+    def test_multistage_resolves_stage_reference(self):
+        content = (
+            'FROM node:18-alpine AS builder\n'
+            'FROM builder\n'
+        )
+        assert extract_final_stage_base(content) == 'node:18-alpine'
+
+    def test_chained_stage_references(self):
+        content = (
+            'FROM node:18-alpine AS base\n'
+            'FROM base AS builder\n'
+            'FROM builder\n'
+        )
+        assert extract_final_stage_base(content) == 'node:18-alpine'
+
+    def test_no_from(self):
+        assert extract_final_stage_base('# empty\n') is None
+
+
+class TestHasHealthcheck:
+
+    def test_healthcheck_present(self, sample_dockerfile):
+        assert has_healthcheck(sample_dockerfile) is True
+
+    def test_no_healthcheck(self):
+        assert has_healthcheck('FROM node:18-alpine\nCMD ["node"]\n') is False
+
+    def test_healthcheck_none_does_not_count(self):
+        content = 'FROM node:18-alpine\nHEALTHCHECK NONE\n'
+        assert has_healthcheck(content) is False
+
+    def test_healthcheck_in_earlier_stage_ignored(self):
+        content = (
+            'FROM node:18-alpine AS builder\n'
+            'HEALTHCHECK CMD true\n'
+            'FROM node:18-alpine\n'
+            'CMD ["node"]\n'
+        )
+        assert has_healthcheck(content) is False
+
+    def test_empty_content(self):
+        assert has_healthcheck('') is False
+
+
+class TestParseHealthcheckParams:
+
+    def test_full_flags(self, sample_dockerfile):
+        result = parse_healthcheck_params(sample_dockerfile)
+        assert result['interval'] == '30s'
+        assert result['timeout'] == '5s'
+        assert result['cmd'] == 'node healthcheck.js'
+
+    def test_quoted_cmd(self):
+        content = 'FROM alpine\nHEALTHCHECK CMD wget -q "http://localhost:8080/health check"\n'
+        result = parse_healthcheck_params(content)
+        assert result['cmd'] == 'wget -q http://localhost:8080/health check'
+
+    def test_single_quoted_cmd_with_flags(self):
+        content = (
+            'FROM alpine\n'
+            "HEALTHCHECK --interval=1m30s --retries=3 "
+            "CMD curl -f 'http://localhost/a b'\n"
+        )
+        result = parse_healthcheck_params(content)
+        assert result['interval'] == '1m30s'
+        assert result['retries'] == '3'
+        assert result['cmd'] == 'curl -f http://localhost/a b'
+
+    def test_no_healthcheck_returns_none(self):
+        assert parse_healthcheck_params('FROM alpine\n') is None
+
+    def test_healthcheck_none_returns_none(self):
+        assert parse_healthcheck_params('FROM alpine\nHEALTHCHECK NONE\n') is None
+
+
+class TestExtractCopyFromExternal:
+
+    def test_stage_references_excluded(self, sample_dockerfile):
+        assert extract_copy_from_external(sample_dockerfile) == ()
+
+    def test_external_image_detected(self):
+        content = (
+            'FROM alpine\n'
+            'COPY --from=ghcr.io/groupsky/homy/tools:1.0 /usr/bin/tool /usr/bin/tool\n'
+        )
+        assert extract_copy_from_external(content) == ('ghcr.io/groupsky/homy/tools:1.0',)
+
+    def test_numeric_stage_index_excluded(self):
+        content = (
+            'FROM alpine AS builder\n'
+            'FROM alpine\n'
+            'COPY --from=0 /a /a\n'
+        )
+        assert extract_copy_from_external(content) == ()
+
+
+class TestValidateNoArgInFrom:
+
+    def test_static_from_passes(self):
+        validate_no_arg_in_from('FROM node:18-alpine\n')
+
+    def test_arg_in_from_raises(self):
+        content = 'ARG VERSION=18\nFROM node:${VERSION}-alpine\n'
+        with pytest.raises(ValidationError):
+            validate_no_arg_in_from(content)
+
+
+class TestParseBaseImageDockerfile:
+
+    def test_simple_image(self):
+        result = parse_base_image_dockerfile('FROM node:18.19.0-alpine3.19\n')
+        assert result == {
+            'upstream_image': 'node:18.19.0-alpine3.19',
+            'image_name': 'node',
+            'version_tag': '18.19.0-alpine3.19',
+        }
+
+    def test_registry_prefix_stripped(self):
+        result = parse_base_image_dockerfile('FROM ghcr.io/linuxserver/wireguard:1.0\n')
+        assert result['image_name'] == 'linuxserver/wireguard'
+        assert result['version_tag'] == '1.0'
+
+    def test_namespace_kept(self):
+        result = parse_base_image_dockerfile('FROM grafana/grafana:9.0.0\n')
+        assert result['image_name'] == 'grafana/grafana'
+
+    def test_no_from(self):
+        assert parse_base_image_dockerfile('# nothing\n') is None
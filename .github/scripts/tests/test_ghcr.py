@@ -0,0 +1,159 @@
+"""Tests for ghcr.py."""
+
+from unittest.mock import Mock, patch
+
+import pytest
+import requests
+
+from errors import ValidationError
+from ghcr import (
+    GHCRRateLimitError,
+    _is_valid_ghcr_tag,
+    _replace_tag_with_sha,
+    check_all_services,
+    check_image_exists,
+    validate_fork_pr_base_images,
+)
+
+
+class TestIsValidGhcrTag:
+
+    def test_valid_tag(self):
+        assert _is_valid_ghcr_tag('ghcr.io/groupsky/homy/broker:abc123') is True
+
+    def test_wrong_registry(self):
+        assert _is_valid_ghcr_tag('docker.io/groupsky/homy/broker:abc123') is False
+
+    def test_missing_tag(self):
+        assert _is_valid_ghcr_tag('ghcr.io/groupsky/homy/broker') is False
+
+    def test_empty(self):
+        assert _is_valid_ghcr_tag('') is False
+
+
+class TestReplaceTagWithSha:
+
+    def test_replaces_existing_tag(self):
+        result = _replace_tag_with_sha('ghcr.io/groupsky/homy/broker:latest', 'abc123')
+        assert result == 'ghcr.io/groupsky/homy/broker:abc123'
+
+    def test_adds_tag_when_missing(self):
+        result = _replace_tag_with_sha('ghcr.io/groupsky/homy/broker', 'abc123')
+        assert result == 'ghcr.io/groupsky/homy/broker:abc123'
+
+    def test_empty_image(self):
+        assert _replace_tag_with_sha('', 'abc123') == ''
+
+
+class TestCheckImageExists:
+
+    def test_existing_image(self):
+        with patch('ghcr._session') as mock_session, \
+                patch('ghcr._ghcr_token', return_value='tok'):
+            mock_session.head.return_value = Mock(status_code=200)
+            assert check_image_exists('ghcr.io/groupsky/homy/broker:abc') is True
+        path = mock_session.head.call_args[0][0]
+        assert path == 'https://ghcr.io/v2/groupsky/homy/broker/manifests/abc'
+
+    def test_missing_image(self):
+        with patch('ghcr._session') as mock_session, \
+                patch('ghcr._ghcr_token', return_value='tok'):
+            mock_session.head.return_value = Mock(status_code=404)
+            assert check_image_exists('ghcr.io/groupsky/homy/broker:abc') is False
+
+    def test_rate_limit_raises(self):
+        with patch('ghcr._session') as mock_session, \
+                patch('ghcr._ghcr_token', return_value='tok'):
+            mock_session.head.return_value = Mock(status_code=429)
+            with pytest.raises(GHCRRateLimitError):
+                check_image_exists('ghcr.io/groupsky/homy/broker:abc')
+
+    def test_transient_error_retried(self):
+        with patch('ghcr._session') as mock_session, \
+                patch('ghcr._ghcr_token', return_value='tok'), \
+                patch('time.sleep') as mock_sleep:
+            mock_session.head.side_effect = [
+                requests.ConnectionError('connection reset'),
+                Mock(status_code=200),
+            ]
+            assert check_image_exists('ghcr.io/groupsky/homy/broker:abc') is True
+        assert mock_session.head.call_count == 2
+        mock_sleep.assert_called_once()
+
+    def test_unexpected_error_raises(self):
+        with patch('ghcr._session') as mock_session, \
+                patch('ghcr._ghcr_token', return_value='tok'), \
+                patch('time.sleep'):
+            mock_session.head.return_value = Mock(status_code=500)
+            with pytest.raises(RuntimeError):
+                check_image_exists('ghcr.io/groupsky/homy/broker:abc')
+
+    def test_result_memoized_per_tag(self):
+        with patch('ghcr._session') as mock_session, \
+                patch('ghcr._ghcr_token', return_value='tok'):
+            mock_session.head.return_value = Mock(status_code=200)
+            assert check_image_exists('ghcr.io/groupsky/homy/broker:abc') is True
+            assert check_image_exists('ghcr.io/groupsky/homy/broker:abc') is True
+        assert mock_session.head.call_count == 1
+
+    def test_disk_cache_preloaded(self, tmp_path, monkeypatch):
+        cache_file = tmp_path / 'ghcr_cache.json'
+        cache_file.write_text('{"ghcr.io/groupsky/homy/broker:abc": true}')
+        monkeypatch.setenv('GHCR_CACHE_FILE', str(cache_file))
+        with patch('ghcr._session') as mock_session:
+            assert check_image_exists('ghcr.io/groupsky/homy/broker:abc') is True
+        mock_session.head.assert_not_called()
+
+    def test_docker_fallback_when_forced(self, monkeypatch):
+        monkeypatch.setenv('FORCE_DOCKER_INSPECT', '1')
+        with patch('shutil.which', return_value='/usr/bin/docker'), \
+                patch('subprocess.run') as mock_run:
+            mock_run.return_value = Mock(returncode=0, stderr='')
+            assert check_image_exists('ghcr.io/groupsky/homy/broker:abc') is True
+        assert 'imagetools' in mock_run.call_args[0][0]
+
+
+class TestCheckAllServices:
+
+    def test_splits_by_existence(self):
+        services = [
+            {'service_name': 'a', 'image': 'ghcr.io/groupsky/homy/a:latest'},
+            {'service_name': 'b', 'image': 'ghcr.io/groupsky/homy/b:latest'},
+        ]
+        with patch('ghcr.check_image_exists') as mock_check:
+            mock_check.side_effect = [True, False]
+            to_build, to_skip = check_all_services(services, 'abc123')
+        assert to_build == ['b']
+        assert to_skip == ['a']
+
+    def test_invalid_tag_goes_to_build(self):
+        services = [{'service_name': 'local', 'image': None}]
+        to_build, to_skip = check_all_services(services, 'abc123')
+        assert to_build == ['local']
+        assert to_skip == []
+
+    def test_registry_error_falls_back_to_build(self):
+        services = [{'service_name': 'a', 'image': 'ghcr.io/groupsky/homy/a:latest'}]
+        with patch('ghcr.check_image_exists') as mock_check:
+            mock_check.side_effect = RuntimeError('boom')
+            to_build, to_skip = check_all_services(services, 'abc123')
+        assert to_build == ['a']
+
+
+class TestValidateForkPrBaseImages:
+
+    def test_all_present(self):
+        with patch('ghcr.check_image_exists', return_value=True):
+            validate_fork_pr_base_images(['ghcr.io/groupsky/homy/alpine:3.19'])
+
+    def test_missing_raises(self):
+        with patch('ghcr.check_image_exists', return_value=False):
+            with pytest.raises(ValidationError) as exc:
+                validate_fork_pr_base_images(['ghcr.io/groupsky/homy/alpine:3.19'])
+        assert 'alpine' in str(exc.value)
+
+    def test_duplicate_tags_checked_once(self):
+        tag = 'ghcr.io/groupsky/homy/alpine:3.19'
+        with patch('ghcr.check_image_exists', return_value=True) as mock_check:
+            validate_fork_pr_base_images([tag, tag, tag])
+        mock_check.assert_called_once_with(tag)
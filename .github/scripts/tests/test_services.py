@@ -0,0 +1,123 @@
+"""Tests for services.py."""
+
+import io
+import json
+from unittest.mock import patch
+
+import yaml
+
+from services import (
+    discover_services_from_compose,
+    discover_services_from_composes,
+    extract_service_metadata,
+    filter_ghcr_services,
+)
+
+
+class TestExtractServiceMetadata:
+
+    def test_build_as_string(self):
+        result = extract_service_metadata('broker', {
+            'build': 'docker/mosquitto',
+            'image': 'ghcr.io/groupsky/homy/mosquitto:latest',
+        })
+        assert result['service_name'] == 'broker'
+        assert result['build_context'] == 'docker/mosquitto'
+        assert result['dockerfile_path'] == 'docker/mosquitto/Dockerfile'
+
+    def test_build_as_dict(self):
+        result = extract_service_metadata('automations', {
+            'build': {'context': 'docker/automations', 'dockerfile': 'Dockerfile.prod'},
+            'image': 'ghcr.io/groupsky/homy/automations:latest',
+        })
+        assert result['build_context'] == 'docker/automations'
+        assert result['dockerfile_path'] == 'docker/automations/Dockerfile.prod'
+
+    def test_no_build_returns_none(self):
+        assert extract_service_metadata('external', {'image': 'grafana/grafana:9.0.0'}) is None
+
+
+class TestFilterGhcrServices:
+
+    def test_keeps_only_ghcr_images(self):
+        services = [
+            {'service_name': 'a', 'image': 'ghcr.io/groupsky/homy/a:latest'},
+            {'service_name': 'b', 'image': 'grafana/grafana:9.0.0'},
+            {'service_name': 'c', 'image': None},
+        ]
+        result = filter_ghcr_services(services)
+        assert [s['service_name'] for s in result] == ['a']
+
+
+class TestDiscoverServicesFromCompose:
+
+    def test_discovers_ghcr_services(self, sample_docker_compose, tmp_path):
+        compose_file = tmp_path / 'docker-compose.yml'
+        compose_file.write_text(yaml.safe_dump(sample_docker_compose))
+        result = discover_services_from_compose(compose_file)
+        names = [s['service_name'] for s in result]
+        assert names == ['automations', 'broker']
+
+    def test_env_interpolation_from_env_file(self, tmp_path):
+        compose_file = tmp_path / 'docker-compose.yml'
+        compose_file.write_text(
+            'services:\n'
+            '  broker:\n'
+            '    build: docker/mosquitto\n'
+            '    image: ghcr.io/groupsky/homy/mosquitto:${TAG:-latest}\n'
+            '  automations:\n'
+            '    build: ${SERVICES_DIR}/automations\n'
+            '    image: ghcr.io/groupsky/homy/automations:latest\n'
+        )
+        (tmp_path / 'example.env').write_text('SERVICES_DIR=docker\n')
+        result = discover_services_from_compose(compose_file)
+        by_name = {s['service_name']: s for s in result}
+        assert by_name['broker']['image'] == 'ghcr.io/groupsky/homy/mosquitto:latest'
+        assert by_name['automations']['build_context'] == 'docker/automations'
+
+    def test_fresh_sidecar_cache_short_circuits_parsing(
+            self, sample_docker_compose, tmp_path):
+        compose_file = tmp_path / 'docker-compose.yml'
+        compose_file.write_text(yaml.safe_dump(sample_docker_compose))
+        first = discover_services_from_compose(compose_file)
+        cache_file = tmp_path / 'docker-compose.yml.cache.json'
+        assert json.loads(cache_file.read_text()) == first
+        cache_file.write_text('[{"service_name": "from-cache"}]')
+        assert discover_services_from_compose(compose_file) == [
+            {'service_name': 'from-cache'}
+        ]
+
+    def test_stale_sidecar_cache_is_regenerated(
+            self, sample_docker_compose, tmp_path):
+        import os
+        compose_file = tmp_path / 'docker-compose.yml'
+        compose_file.write_text(yaml.safe_dump(sample_docker_compose))
+        cache_file = tmp_path / 'docker-compose.yml.cache.json'
+        cache_file.write_text('[{"service_name": "stale"}]')
+        os.utime(cache_file, (0, 0))
+        result = discover_services_from_compose(compose_file)
+        assert [s['service_name'] for s in result] == ['automations', 'broker']
+
+    def test_multiple_compose_files_aggregated(self, tmp_path):
+        for name, service in (('a.yml', 'broker'), ('b.yml', 'automations')):
+            (tmp_path / name).write_text(
+                f'services:\n'
+                f'  {service}:\n'
+                f'    build: docker/{service}\n'
+                f'    image: ghcr.io/groupsky/homy/{service}:latest\n'
+            )
+        result = discover_services_from_composes(
+            [tmp_path / 'a.yml', tmp_path / 'b.yml'])
+        assert [s['service_name'] for s in result] == ['broker', 'automations']
+
+    def test_cli_fallback_without_yaml(self, sample_docker_compose, tmp_path):
+        compose_file = tmp_path / 'docker-compose.yml'
+        compose_file.write_text('# resolved via docker compose config\n')
+        with patch('services.yaml', None), patch('subprocess.Popen') as mock_popen:
+            proc = mock_popen.return_value
+            proc.stdout = io.StringIO(json.dumps(sample_docker_compose))
+            proc.stderr = io.BytesIO(b'')
+            proc.wait.return_value = 0
+            result = discover_services_from_compose(compose_file)
+        names = [s['service_name'] for s in result]
+        assert names == ['automations', 'broker']
@@ -0,0 +1,112 @@
+"""Tests for validation.py."""
+
+import pytest
+
+from errors import ValidationError
+from validation import (
+    has_real_tests,
+    validate_dockerfile,
+    validate_nvmrc,
+    validate_package_json,
+)
+
+
+class TestValidateNvmrc:
+
+    def test_valid_version(self, tmp_path):
+        nvmrc = tmp_path / '.nvmrc'
+        nvmrc.write_text('18.19.0\n')
+        assert validate_nvmrc(nvmrc) == '18.19.0'
+
+    def test_v_prefix_accepted(self, tmp_path):
+        nvmrc = tmp_path / '.nvmrc'
+        nvmrc.write_text('v18.19.0\n')
+        assert validate_nvmrc(nvmrc) == 'v18.19.0'
+
+    def test_missing_file(self, tmp_path):
+        with pytest.raises(ValidationError):
+            validate_nvmrc(tmp_path / '.nvmrc')
+
+    def test_empty_file(self, tmp_path):
+        nvmrc = tmp_path / '.nvmrc'
+        nvmrc.write_text('')
+        with pytest.raises(ValidationError):
+            validate_nvmrc(nvmrc)
+
+    def test_garbage_version(self, tmp_path):
+        nvmrc = tmp_path / '.nvmrc'
+        nvmrc.write_text('lts/hydrogen\n')
+        with pytest.raises(ValidationError):
+            validate_nvmrc(nvmrc)
+
+
+class TestValidateDockerfile:
+
+    def test_valid_dockerfile(self, tmp_path):
+        dockerfile = tmp_path / 'Dockerfile'
+        dockerfile.write_text('FROM node:18-alpine\nCMD ["node"]\n')
+        validate_dockerfile(dockerfile)
+
+    def test_missing_dockerfile(self, tmp_path):
+        with pytest.raises(ValidationError):
+            validate_dockerfile(tmp_path / 'Dockerfile')
+
+    def test_empty_dockerfile(self, tmp_path):
+        dockerfile = tmp_path / 'Dockerfile'
+        dockerfile.write_text('  \n')
+        with pytest.raises(ValidationError):
+            validate_dockerfile(dockerfile)
+
+    def test_no_from(self, tmp_path):
+        dockerfile = tmp_path / 'Dockerfile'
+        dockerfile.write_text('# comment only\n')
+        with pytest.raises(ValidationError):
+            validate_dockerfile(dockerfile)
+
+    def test_arg_in_from(self, tmp_path):
+        dockerfile = tmp_path / 'Dockerfile'
+        dockerfile.write_text('ARG V=18\nFROM node:${V}-alpine\n')
+        with pytest.raises(ValidationError):
+            validate_dockerfile(dockerfile)
+
+
+class TestHasRealTests:
+
+    def test_npm_placeholder_is_not_real(self):
+        package_json = {'scripts': {
+            'test': 'echo "Error: no test specified" && exit 1',
+        }}
+        assert has_real_tests(package_json) is False
+
+    def test_exit_1_is_not_real(self):
+        assert has_real_tests({'scripts': {'test': 'exit 1'}}) is False
+
+    def test_missing_script_is_not_real(self):
+        assert has_real_tests({}) is False
+
+    def test_jest_is_real(self):
+        assert has_real_tests({'scripts': {'test': 'jest --ci'}}) is True
+
+    def test_mocha_is_real(self):
+        assert has_real_tests({'scripts': {'test': 'mocha test/'}}) is True
+
+    def test_node_test_runner_is_real(self):
+        assert has_real_tests({'scripts': {'test': 'node --test test/'}}) is True
+
+    def test_unknown_runner_assumed_real(self):
+        assert has_real_tests({'scripts': {'test': './run-tests.sh'}}) is True
+
+
+class TestValidatePackageJson:
+
+    def test_valid(self):
+        result = validate_package_json('{"scripts": {"test": "jest"}}')
+        assert result['scripts']['test'] == 'jest'
+
+    def test_invalid_json(self):
+        with pytest.raises(ValidationError):
+            validate_package_json('{broken')
+
+    def test_missing_test_script(self):
+        with pytest.raises(ValidationError):
+            validate_package_json('{"scripts": {}}')
@@ -0,0 +1,48 @@
+"""Tests for version_normalizer.py."""
+
+import pytest
+
+from version_normalizer import extract_semver_core, normalize_version
+
+
+class TestNormalizeVersion:
+
+    def test_alpine_patch_suffix_collapsed(self):
+        assert normalize_version('18.19.0-alpine3.19') == '18.19.0-alpine'
+
+    def test_alpine_without_patch_unchanged(self):
+        assert normalize_version('18.19.0-alpine') == '18.19.0-alpine'
+
+    def test_debian_suffix_collapsed(self):
+        assert normalize_version('18.19.0-debian12') == '18.19.0-debian'
+
+    def test_plain_version_unchanged(self):
+        assert normalize_version('18.19.0') == '18.19.0'
+
+    def test_empty_string(self):
+        assert normalize_version('') == ''
+
+    def test_non_string_raises(self):
+        with pytest.raises(AttributeError):
+            normalize_version(18)
+
+
+class TestExtractSemverCore:
+
+    def test_plain_semver(self):
+        assert extract_semver_core('18.19.0') == '18.19.0'
+
+    def test_v_prefix_stripped(self):
+        assert extract_semver_core('v18.19.0') == '18.19.0'
+
+    def test_suffix_ignored(self):
+        assert extract_semver_core('18.19.0-alpine3.19') == '18.19.0'
+
+    def test_major_only(self):
+        assert extract_semver_core('18') == '18'
+
+    def test_no_digits(self):
+        assert extract_semver_core('latest') is None
+
+    def test_empty(self):
+        assert extract_semver_core('') is None
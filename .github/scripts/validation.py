@@ -0,0 +1,117 @@
+"""Validators for the packaging conventions services must follow."""
+
+import json
+import re
+from pathlib import Path
+
+from errors import ValidationError
+
+try:
+    # Linear-time DFA engine; immune to pathological backtracking on
+    # long test scripts.  Optional — stdlib re is the fallback.
+    import re2 as _re
+except ImportError:
+    _re = re
+
+_NODE_VERSION_RE = re.compile(r'v?\d+(\.\d+){0,2}$')
+
+# Single alternations compiled once: one scan over the test script
+# instead of one re.search (with per-call compilation) per pattern.
+_PLACEHOLDER_RE = _re.compile(
+    r'echo.*no.*test.*specified.*&&.*exit 1'
+    r'|echo.*no.*tests?'
+    r'|^exit\s+1'
+    r'|^true$'
+)
+_REAL_TEST_RE = _re.compile(
+    r'\bjest\b|\bmocha\b|\bpytest\b|\btap\b|\bava\b|\bvitest\b|node\s+--test'
+)
+
+
+def validate_nvmrc(nvmrc_path):
+    """Ensure a service's .nvmrc pins a concrete node version."""
+    nvmrc_path = Path(nvmrc_path)
+    try:
+        # One stat settles both "missing" and "empty" without opening.
+        if nvmrc_path.stat().st_size == 0:
+            raise ValidationError(f"empty .nvmrc: {nvmrc_path}")
+    except FileNotFoundError:
+        raise ValidationError(f"missing .nvmrc: {nvmrc_path}") from None
+    # A pinned node version fits in 64 bytes; never read more, even from
+    # an accidentally committed large file.
+    with nvmrc_path.open('rb') as f:
+        content = f.read(64).decode('utf-8', errors='replace').strip()
+    if not content:
+        raise ValidationError(f"empty .nvmrc: {nvmrc_path}")
+    if not _NODE_VERSION_RE.fullmatch(content):
+        raise ValidationError(
+            f"invalid node version {content!r} in {nvmrc_path}: "
+            "expected a semver like 18.19.0"
+        )
+    return content
+
+
+def validate_dockerfile(dockerfile_path):
+    """Ensure a service Dockerfile exists and is statically parseable."""
+    # Deferred: the parser is only needed here, and callers that just
+    # validate package.json/.nvmrc skip its import cost entirely.
+    from dockerfile_parser import parse_from_lines, validate_no_arg_in_from
+
+    dockerfile_path = Path(dockerfile_path)
+    try:
+        if dockerfile_path.stat().st_size == 0:
+            raise ValidationError(f"empty Dockerfile: {dockerfile_path}")
+        raw = dockerfile_path.read_bytes()
+    except FileNotFoundError:
+        raise ValidationError(f"missing Dockerfile: {dockerfile_path}") from None
+    # Emptiness check on the raw bytes; for big files a short-circuiting
+    # scan avoids the stripped copy (a real Dockerfile has content in its
+    # first bytes anyway).
+    if len(raw) < 4096:
+        is_empty = not raw.strip()
+    else:
+        is_empty = all(byte in b' \t\r\n' for byte in raw)
+    if is_empty:
+        raise ValidationError(f"empty Dockerfile: {dockerfile_path}")
+    # Decode once; both helpers share the same string (and its parse
+    # cache entry).
+    content = raw.decode('utf-8')
+    if not parse_from_lines(content):
+        raise ValidationError(f"no FROM instruction in {dockerfile_path}")
+    validate_no_arg_in_from(content)
+
+
+def has_real_tests(package_json) -> bool:
+    """True when the package's test script runs an actual test suite.
+
+    npm's generated placeholder ("no test specified" + exit 1) and similar
+    stubs do not count.
+    """
+    scripts = package_json.get('scripts') or {}
+    script = (scripts.get('test') or '').strip().lower()
+    if not script:
+        return False
+    # Literal fast paths cover the common cases (npm's generated
+    # placeholder and well-known runners) without regex engine calls.
+    if 'no test specified' in script or script.startswith('exit 1'):
+        return False
+    if any(runner in script for runner in
+           ('jest', 'mocha', 'pytest', 'vitest', 'node --test')):
+        return True
+    if _PLACEHOLDER_RE.search(script):
+        return False
+    if _REAL_TEST_RE.search(script):
+        return True
+    # Unknown runner: assume the script does run tests.
+    return True
+
+
+def validate_package_json(package_json_content) -> dict:
+    """Parse package.json content and ensure it declares a test script."""
+    try:
+        package_json = json.loads(package_json_content)
+    except json.JSONDecodeError as exc:
+        raise ValidationError(f"invalid package.json: {exc}") from exc
+    if 'test' not in (package_json.get('scripts') or {}):
+        raise ValidationError("package.json has no test script")
+    return package_json
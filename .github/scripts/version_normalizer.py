@@ -0,0 +1,64 @@
+"""Normalization helpers for upstream image version tags."""
+
+import functools
+from typing import Optional
+
+_DISTRO_SUFFIXES = ('-alpine', '-debian', '-ubuntu')
+_VERSION_CHARS = '0123456789.'
+
+
+# The same handful of base-image tags recurs across every service, so
+# both normalizers are memoized; repeat calls cost one dict lookup.
+@functools.lru_cache(maxsize=1024)
+def normalize_version(version) -> str:
+    """Collapse distro patch suffixes from a version tag.
+
+    ``18.19.0-alpine3.19`` and ``18.19.0-alpine3.18`` both normalize to
+    ``18.19.0-alpine`` so distro patch bumps compare equal.
+
+    Tags are short strings, so C-level find plus one slice beats running
+    the regex engine over each candidate suffix.
+    """
+    if not isinstance(version, str):
+        # Same contract as the str methods a non-string would hit below.
+        raise AttributeError(
+            f"expected a version string, got {type(version).__name__}")
+    if not version:
+        return ''
+    for suffix in _DISTRO_SUFFIXES:
+        start = version.find(suffix)
+        if start == -1:
+            continue
+        end = start + len(suffix)
+        i = end
+        while i < len(version) and version[i] in _VERSION_CHARS:
+            i += 1
+        if i == len(version):
+            # The trailing run of digits/dots is the distro patch level.
+            return version[:end]
+    return version
+
+
+@functools.lru_cache(maxsize=1024)
+def extract_semver_core(version) -> Optional[str]:
+    """Return the leading numeric ``X[.Y[.Z]]`` part of a tag, if any."""
+    if not version:
+        return None
+    if version.startswith('v'):
+        version = version[1:]
+    n = len(version)
+    i = 0
+    while i < n and version[i].isdigit():
+        i += 1
+    if i == 0:
+        return None
+    for _ in range(2):
+        if i >= n or version[i] != '.':
+            break
+        j = i + 1
+        while j < n and version[j].isdigit():
+            j += 1
+        if j == i + 1:
+            break
+        i = j
+    return version[:i]